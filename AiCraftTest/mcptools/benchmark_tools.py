@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+数据库工具基准测试 - 测量Agent SQL工具路径的执行耗时
+
+以指定并发回放SQL语料（create_demo_queries中的演示查询 + 录制的Agent会话），
+按工具统计 p50/p95/p99 延迟和吞吐量，并对比不同连接策略（共享单连接 vs 连接池）。
+默认使用嵌入式SQLite作为MySQL替身，无需网络。
+
+用法:
+    python benchmark_tools.py --backend sqlite --concurrency 1 8 32 --repeat 20
+    python benchmark_tools.py --corpus sessions.jsonl --strategies single pool --pool-size 8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from autogen_core import CancellationToken
+
+from AiCraftTest.mcptools.create_demo_tables import MySQLDemoManager
+from AiCraftTest.mcptools.mysql_tools import (
+    TOOL_ERROR_PREFIXES,
+    create_database_backend,
+    create_mysql_tools,
+    set_database_backend,
+)
+
+
+async def build_corpus(corpus_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """构建回放语料
+
+    默认语料为演示查询加上对三张表的 list_tables/describe_table 调用；
+    corpus_path 为录制的会话文件（JSONL），每行形如 {"tool": "query", "args": {"sql": "..."}}。
+    """
+    corpus = [{"tool": "list_tables", "args": {}}]
+    corpus.extend({"tool": "describe_table", "args": {"table": table}} for table in ("users", "products", "orders"))
+
+    demo_queries = await MySQLDemoManager().create_demo_queries()
+    corpus.extend({"tool": "query", "args": {"sql": item["sql"].strip().rstrip(";")}} for item in demo_queries)
+
+    if corpus_path:
+        with open(corpus_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    corpus.append(json.loads(line))
+    return corpus
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_benchmark(tools, corpus: List[Dict[str, Any]], concurrency: int, repeat: int) -> Dict[str, Any]:
+    """以固定并发回放语料，返回每个工具的延迟统计"""
+    tools_by_name = {tool.name: tool for tool in tools}
+    requests = [entry for _ in range(repeat) for entry in corpus]
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for entry in requests:
+        queue.put_nowait(entry)
+
+    async def worker():
+        cancellation_token = CancellationToken()
+        while True:
+            try:
+                entry = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            tool = tools_by_name.get(entry["tool"])
+            if tool is None:
+                errors[entry["tool"]] = errors.get(entry["tool"], 0) + 1
+                continue
+            started = time.perf_counter()
+            result = await tool.run_json(entry.get("args", {}), cancellation_token)
+            elapsed = time.perf_counter() - started
+            latencies.setdefault(tool.name, []).append(elapsed)
+            if isinstance(result, str) and result.lstrip().startswith(TOOL_ERROR_PREFIXES):
+                errors[tool.name] = errors.get(tool.name, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - started
+
+    per_tool = {}
+    all_latencies: List[float] = []
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        all_latencies.extend(values)
+        per_tool[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "throughput": len(values) / wall_time if wall_time else 0.0,
+        }
+    all_latencies.sort()
+    per_tool["(all)"] = {
+        "count": len(all_latencies),
+        "errors": sum(errors.values()),
+        "p50_ms": percentile(all_latencies, 50) * 1000,
+        "p95_ms": percentile(all_latencies, 95) * 1000,
+        "p99_ms": percentile(all_latencies, 99) * 1000,
+        "throughput": len(all_latencies) / wall_time if wall_time else 0.0,
+    }
+    return {"wall_time": wall_time, "tools": per_tool}
+
+
+def create_backend(backend_name: str, strategy: str, pool_size: int, database: Optional[str]):
+    """按连接策略创建后端: single 为共享单连接，pool 为连接池"""
+    size = 1 if strategy == "single" else pool_size
+    if backend_name == "mysql":
+        return create_database_backend("mysql", pool_size=size)
+    return create_database_backend(backend_name, database=database, pool_size=size)
+
+
+def print_report(label: str, report: Dict[str, Any]) -> None:
+    print(f"\n=== {label} (耗时 {report['wall_time']:.2f}s) ===")
+    print(f"{'工具':<16}{'次数':>8}{'错误':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'吞吐(次/s)':>12}")
+    for name, stats in report["tools"].items():
+        print(
+            f"{name:<16}{stats['count']:>8}{stats['errors']:>6}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['throughput']:>12.1f}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="数据库Agent工具路径基准测试")
+    parser.add_argument("--backend", choices=["sqlite", "duckdb", "mysql"], default="sqlite", help="数据库后端")
+    parser.add_argument("--database", help="嵌入式数据库文件路径（默认使用临时文件）")
+    parser.add_argument("--corpus", help="录制的会话语料文件 (JSONL)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="并发数，可指定多个")
+    parser.add_argument("--repeat", type=int, default=10, help="语料重复次数")
+    parser.add_argument("--strategies", nargs="+", choices=["single", "pool"], default=["single", "pool"], help="连接策略")
+    parser.add_argument("--pool-size", type=int, default=8, help="pool策略的连接池大小")
+    parser.add_argument("--output", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    # mysql_tools在导入时已配置INFO级别日志，这里调高以免工具调用事件淹没报告
+    logging.getLogger().setLevel(logging.WARNING)
+    corpus = await build_corpus(args.corpus)
+    print(f"语料: {len(corpus)} 条调用 × {args.repeat} 次, 后端: {args.backend}")
+
+    # 嵌入式库使用文件，使连接池中的多个连接看到同一份数据
+    database = args.database
+    temp_dir = None
+    if args.backend != "mysql" and database is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        database = os.path.join(temp_dir.name, f"benchmark.{args.backend}")
+
+    results = []
+    try:
+        for strategy in args.strategies:
+            backend = create_backend(args.backend, strategy, args.pool_size, database)
+            set_database_backend(backend)
+            # 关闭token截断，只测量数据库和编码本身的耗时
+            tools = create_mysql_tools(max_result_tokens=0)
+            if not tools:
+                print(f"❌ {strategy} 策略的工具创建失败")
+                continue
+            for concurrency in args.concurrency:
+                report = await run_benchmark(tools, corpus, concurrency, args.repeat)
+                label = f"{args.backend} / {strategy} / 并发 {concurrency}"
+                print_report(label, report)
+                results.append({
+                    "backend": args.backend,
+                    "strategy": strategy,
+                    "pool_size": 1 if strategy == "single" else args.pool_size,
+                    "concurrency": concurrency,
+                    **report,
+                })
+            backend.close()
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 结果已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,7 +15,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(project_root)
 
-from AiCraftTest.mcptools.mysql_tools import create_mysql_tools, test_mysql_connection
+from AiCraftTest.mcptools.mysql_tools import create_mysql_tools, get_database_backend
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -34,7 +34,7 @@ class MySQLDemoManager:
         
         # 测试连接
         logger.info("🔗 测试连接...")
-        self.connected = await test_mysql_connection()
+        self.connected = get_database_backend().initialize()
         
         if not self.connected:
             logger.error("❌ 连接失败，无法继续演示")
@@ -44,7 +44,7 @@ class MySQLDemoManager:
         
         # 加载工具
         logger.info("🛠️ 加载MySQL工具...")
-        self.tools = await create_mysql_tools()
+        self.tools = create_mysql_tools()
         
         if not self.tools:
             logger.error("❌ 工具加载失败")
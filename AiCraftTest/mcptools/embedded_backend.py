@@ -0,0 +1,298 @@
+"""
+嵌入式数据库后端 - 使用SQLite或DuckDB实现MySQL工具的后端接口
+用于离线测试、压测以及对导出数据的进程内分析
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import re
+import sqlite3
+import sys
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# 添加项目根目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from AiCraftTest.mcptools.mysql_tools import ConnectionPool, DatabaseBackend, mask_sql_literals
+
+logger = logging.getLogger(__name__)
+
+_PYMYSQL_PLACEHOLDER = re.compile(r"%[s%]")
+
+
+def translate_placeholders(sql: str) -> str:
+    """把pymysql风格的参数化SQL转换为qmark风格
+
+    字符串和注释之外的%s转换为?；%%与pymysql一致还原为%。
+    """
+    masked = mask_sql_literals(sql)
+
+    def replace(match: re.Match) -> str:
+        if match.group() == "%%":
+            return "%"
+        # 字面量内的字符在masked中已被替换为空格
+        return "?" if masked[match.start()] == "%" else match.group()
+
+    return _PYMYSQL_PLACEHOLDER.sub(replace, sql)
+
+
+
+class _DictCursor:
+    """将DB-API游标包装为pymysql DictCursor风格：%s占位符、字典行、上下文管理"""
+
+    def __init__(self, cursor, lock: threading.RLock):
+        self._cursor = cursor
+        self._lock = lock
+        self._rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def execute(self, sql: str, params: Optional[List] = None):
+        with self._lock:
+            if params:
+                # 工具层沿用pymysql的%s占位符
+                self._cursor.execute(translate_placeholders(sql), tuple(params))
+            else:
+                self._cursor.execute(sql)
+            self._rowcount = getattr(self._cursor, "rowcount", -1)
+            if self._rowcount < 0 and sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+                # DuckDB不填充rowcount，而是返回一行影响行数
+                row = self._cursor.fetchone()
+                self._rowcount = row[0] if row else -1
+        return self._rowcount
+
+    def _columns(self) -> List[str]:
+        return [column[0] for column in (self._cursor.description or [])]
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._cursor.fetchone()
+        return dict(zip(self._columns(), row)) if row is not None else None
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        columns = self._columns()
+        with self._lock:
+            rows = self._cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    @property
+    def rowcount(self) -> int:
+        return self._rowcount
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class _Connection:
+    """嵌入式数据库连接包装，接口与pymysql连接一致"""
+
+    def __init__(self, raw_connection):
+        self._raw = raw_connection
+        self._lock = threading.RLock()
+        self.open = True
+
+    def cursor(self) -> _DictCursor:
+        return _DictCursor(self._raw.cursor(), self._lock)
+
+    def commit(self) -> None:
+        self._raw.commit()
+
+    def rollback(self) -> None:
+        self._raw.rollback()
+
+    def close(self) -> None:
+        if self.open:
+            self._raw.close()
+            self.open = False
+
+
+def mysql_ddl_to_embedded(sql: str, engine: str = "sqlite") -> str:
+    """将create_demo_tables.py中的MySQL建表语句转换为SQLite/DuckDB可执行的语句"""
+    table_match = re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", sql, re.IGNORECASE)
+    table = table_match.group(1) if table_match else "t"
+
+    # 去掉内联索引定义和表选项
+    lines = [line for line in sql.strip().splitlines() if not re.match(r"\s*(UNIQUE\s+)?INDEX\s", line, re.IGNORECASE)]
+    ddl = "\n".join(lines)
+    ddl = re.sub(r"\)\s*ENGINE=[^;]*;?\s*$", ")", ddl, flags=re.IGNORECASE)
+    ddl = re.sub(r",\s*\)$", "\n)", ddl)
+    ddl = re.sub(r"ENUM\([^)]*\)", "TEXT", ddl, flags=re.IGNORECASE)
+    ddl = re.sub(r"\s+ON UPDATE CURRENT_TIMESTAMP", "", ddl, flags=re.IGNORECASE)
+
+    if engine == "duckdb":
+        # DuckDB没有AUTO_INCREMENT，使用序列代替；外键不支持级联删除
+        ddl = re.sub(
+            r"\bINT\s+AUTO_INCREMENT\s+PRIMARY KEY",
+            f"INTEGER PRIMARY KEY DEFAULT nextval('seq_{table}_id')",
+            ddl, flags=re.IGNORECASE,
+        )
+        ddl = re.sub(r"\s+ON DELETE CASCADE", "", ddl, flags=re.IGNORECASE)
+        ddl = f"CREATE SEQUENCE IF NOT EXISTS seq_{table}_id START 1;\n{ddl}"
+    else:
+        ddl = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT", ddl, flags=re.IGNORECASE)
+    return ddl + ";"
+
+
+def load_demo_statements(engine: str = "sqlite") -> List[str]:
+    """读取create_demo_tables.py中的users/products/orders建表与数据语句"""
+    from AiCraftTest.mcptools.create_demo_tables import MySQLDemoManager
+
+    async def _collect():
+        manager = MySQLDemoManager()
+        return await manager.create_demo_database(), await manager.create_demo_data()
+
+    # 调用方可能已处于事件循环中，在独立线程里运行这些无IO的协程
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        table_commands, data_commands = executor.submit(asyncio.run, _collect()).result()
+    statements = [
+        mysql_ddl_to_embedded(cmd["sql"], engine)
+        for cmd in table_commands
+        if cmd["sql"].strip().upper().startswith("CREATE TABLE")
+    ]
+    statements.extend(cmd["sql"].strip() for cmd in data_commands)
+    return statements
+
+
+class EmbeddedBackend(DatabaseBackend):
+    """SQLite/DuckDB嵌入式后端
+
+    Args:
+        engine: sqlite 或 duckdb
+        database: 数据库文件路径，默认内存库
+        seed: 数据库为空时是否写入演示表和数据
+        pool_size: 连接数，为1时所有请求共享同一连接
+    """
+
+    def __init__(self, engine: str = "sqlite", database: str = ":memory:", seed: bool = True, pool_size: int = 1):
+        if engine not in ("sqlite", "duckdb"):
+            raise ValueError(f"不支持的嵌入式引擎: {engine}")
+        self.name = engine
+        self.engine = engine
+        self.database = database
+        self.seed = seed
+        self.pool_size = pool_size
+        self._connection: Optional[_Connection] = None
+        self._pool: Optional[ConnectionPool] = None
+        if pool_size > 1:
+            self._pool = ConnectionPool(self._connect_pooled, pool_size)
+
+    def _connect(self) -> _Connection:
+        if self.engine == "duckdb":
+            try:
+                import duckdb
+            except ImportError:
+                raise Exception("DuckDB未安装，请运行: pip install duckdb")
+            raw = duckdb.connect(self.database)
+        else:
+            # Flask等多线程环境共享同一连接，由_Connection内部的锁串行化
+            raw = sqlite3.connect(self._sqlite_target(), check_same_thread=False, uri=True)
+            raw.execute("PRAGMA foreign_keys = ON")
+        return _Connection(raw)
+
+    def _sqlite_target(self) -> str:
+        if self.database == ":memory:" and self.pool_size > 1:
+            # 内存库在多个连接间共享需要使用共享缓存URI
+            return f"file:aicraft_{id(self)}?mode=memory&cache=shared"
+        if self.database == ":memory:" or self.database.startswith("file:"):
+            return self.database
+        return f"file:{self.database}"
+
+    def _connect_pooled(self) -> _Connection:
+        """连接池中的连接，始终在主连接（负责建库和写入演示数据）之后创建"""
+        primary = self._get_connection()
+        if self.engine == "duckdb":
+            # DuckDB同一数据库实例上的cursor即独立连接，可在不同线程并发使用
+            return _Connection(primary._raw.cursor())
+        return self._connect()
+
+    def _get_connection(self) -> _Connection:
+        if self._connection is None or not self._connection.open:
+            self._connection = self._connect()
+            logger.info(f"{self.engine}数据库已打开: {self.database}")
+            if self.seed:
+                with self._connection.cursor() as cursor:
+                    if not self.list_tables(cursor):
+                        self.seed_demo_data()
+        return self._connection
+
+    def seed_demo_data(self) -> None:
+        """写入create_demo_tables.py定义的演示表和数据"""
+        connection = self._connection
+        for statement in load_demo_statements(self.engine):
+            # DuckDB的序列语句与建表语句放在同一段文本中
+            for part in (p for p in statement.split(";\n") if p.strip()):
+                with connection.cursor() as cursor:
+                    cursor.execute(part)
+        connection.commit()
+        logger.info("已写入演示数据: users/products/orders")
+
+    def initialize(self) -> bool:
+        try:
+            with self._get_connection().cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"{self.engine}数据库初始化失败: {e}")
+            return False
+
+    @contextmanager
+    def connection(self, session_id: Optional[str] = None, write: bool = False):
+        if self._pool is not None:
+            with self._pool.connection() as connection:
+                yield connection
+        else:
+            yield self._get_connection()
+
+    def list_tables(self, cursor) -> List[str]:
+        if self.engine == "duckdb":
+            cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'main' ORDER BY table_name")
+        else:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        return [list(row.values())[0] for row in cursor.fetchall()]
+
+    def describe_table(self, cursor, table: str) -> List[Dict]:
+        if self.engine == "duckdb":
+            cursor.execute(f"DESCRIBE {table}")
+            return [
+                {
+                    "Field": column["column_name"],
+                    "Type": column["column_type"],
+                    "Null": column["null"],
+                    "Key": column.get("key") or "",
+                    "Default": column.get("default"),
+                    "Extra": column.get("extra") or "",
+                }
+                for column in cursor.fetchall()
+            ]
+
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [
+            {
+                "Field": column["name"],
+                "Type": column["type"],
+                "Null": "NO" if column["notnull"] or column["pk"] else "YES",
+                "Key": "PRI" if column["pk"] else "",
+                "Default": column["dflt_value"],
+                "Extra": "",
+            }
+            for column in cursor.fetchall()
+        ]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            logger.info(f"{self.engine}数据库已关闭")
@@ -7,8 +7,16 @@ import os
 import logging
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Type
+from typing import Callable, ContextManager, Dict, List, Optional, Any, Tuple, Type
+import csv
+import io
 import json
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
 from pydantic import BaseModel, Field
 from autogen_core import CancellationToken, Component
@@ -28,6 +36,22 @@ MYSQL_CONFIG = {
     "charset": "utf8mb4"
 }
 
+# 只读副本配置 - MYSQL_REPLICA_HOSTS 为逗号分隔的 host[:port] 列表，为空时读请求使用主库
+REPLICA_CONFIG = {
+    "hosts": [h.strip() for h in os.environ.get("MYSQL_REPLICA_HOSTS", "").split(",") if h.strip()],
+    "max_lag_seconds": int(os.environ.get("MYSQL_REPLICA_MAX_LAG", "5")),  # 超过此延迟的副本被排除
+    "lag_check_interval": 30,  # 副本延迟检查间隔(秒)
+    "sticky_seconds": 10,  # 会话写入后在此时间内读请求固定走主库（读己之写）
+}
+
+# 查询预检配置 - 执行前通过 EXPLAIN FORMAT=JSON 估算扫描行数
+QUERY_GUARD_CONFIG = {
+    "enabled": os.environ.get("MYSQL_QUERY_GUARD", "1") != "0",
+    "max_rows_examined": int(os.environ.get("MYSQL_MAX_ROWS_EXAMINED", "100000")),
+    "action": os.environ.get("MYSQL_GUARD_ACTION", "limit"),  # limit: 自动追加LIMIT; reject: 直接拒绝
+    "default_limit": int(os.environ.get("MYSQL_GUARD_LIMIT", "1000")),
+}
+
 # 尝试导入MySQL客户端
 try:
     import pymysql
@@ -66,6 +90,50 @@ class MySQLToolConfig(BaseModel):
     """工具名称"""
     description: Optional[str]
     """工具描述"""
+    result_format: str = "auto"
+    """结果编码格式: auto/markdown/csv/tsv/json"""
+    max_result_tokens: int = 2000
+    """结果文本的token预算，超出时截断行"""
+    session_id: Optional[str] = None
+    """Agent会话标识，用于副本路由的读己之写"""
+
+# 工具返回的错误文本前缀，用于统计失败次数
+TOOL_ERROR_PREFIXES = ("错误", "查询执行失败", "SQL执行失败", "获取表列表失败", "获取表结构失败")
+
+class ToolMetrics:
+    """按工具名称统计调用次数、错误数和耗时
+
+    在工具内部记录，Agent的工具调用和直接调用都会被统计。
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed: float, failed: bool) -> None:
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._stats.setdefault(name, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_ms"] = elapsed_ms
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                    "last_ms": round(stats["last_ms"], 2),
+                }
+                for name, stats in self._stats.items()
+            }
+
+tool_metrics = ToolMetrics()
 
 class MySQLTool(BaseTool[BaseModel, str], Component[MySQLToolConfig]):
     """MySQL工具基类，参考AutoGen工具实现"""
@@ -78,11 +146,17 @@ class MySQLTool(BaseTool[BaseModel, str], Component[MySQLToolConfig]):
         self,
         name: str,
         input_model: Type[BaseModel],
-        description: str = "MySQL工具"
+        description: str = "MySQL工具",
+        result_format: str = "auto",
+        max_result_tokens: int = 2000,
+        session_id: Optional[str] = None
     ) -> None:
         self.tool_params = MySQLToolConfig(
             name=name,
-            description=description
+            description=description,
+            result_format=result_format,
+            max_result_tokens=max_result_tokens,
+            session_id=session_id
         )
         
         # base_return_type始终为str
@@ -90,6 +164,20 @@ class MySQLTool(BaseTool[BaseModel, str], Component[MySQLToolConfig]):
         
         super().__init__(input_model, base_return_type, name, description)
     
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> str:
+        started = time.perf_counter()
+        failed = True
+        try:
+            # 数据库驱动是阻塞调用，放到线程中执行，避免阻塞Agent的事件循环
+            result = await asyncio.to_thread(self._run, args)
+            failed = result.lstrip().startswith(TOOL_ERROR_PREFIXES)
+            return result
+        finally:
+            tool_metrics.record(self.name, time.perf_counter() - started, failed)
+    
+    def _run(self, args: BaseModel) -> str:
+        raise NotImplementedError
+    
     def _to_config(self) -> MySQLToolConfig:
         return self.tool_params.model_copy()
     
@@ -98,102 +186,620 @@ class MySQLTool(BaseTool[BaseModel, str], Component[MySQLToolConfig]):
         copied_config = config.model_copy().model_dump()
         return cls(**copied_config)
 
-# 全局连接变量
-_mysql_connection = None
+def _connect(host: str, port: int):
+    """按MYSQL_CONFIG的账号信息连接指定节点"""
+    return pymysql.connect(
+        host=host,
+        port=port,
+        user=MYSQL_CONFIG['user'],
+        password=MYSQL_CONFIG['password'],
+        database=MYSQL_CONFIG['database'],
+        charset=MYSQL_CONFIG['charset'],
+        cursorclass=pymysql.cursors.DictCursor
+    )
 
-def get_mysql_connection():
-    """获取MySQL连接"""
-    global _mysql_connection
-    
-    if not MYSQL_AVAILABLE:
-        raise Exception("MySQL客户端库未安装")
-    
-    if _mysql_connection is None or not _mysql_connection.open:
+class ConnectionPool:
+    """线程安全的连接池
+
+    连接按需创建，最多size个；size=1时等价于共享一个全局连接，请求串行使用。
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 1, timeout: float = 30):
+        self._factory = factory
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                connection = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise Exception(f"等待数据库连接超时({self.timeout}秒)")
+
+        # 连接已断开时重建
+        if not getattr(connection, "open", True):
+            try:
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """借出一个连接，使用完毕后自动归还"""
+        connection = self._checkout()
         try:
-            _mysql_connection = pymysql.connect(
-                host=MYSQL_CONFIG['host'],
-                port=MYSQL_CONFIG['port'],
-                user=MYSQL_CONFIG['user'],
-                password=MYSQL_CONFIG['password'],
-                database=MYSQL_CONFIG['database'],
-                charset=MYSQL_CONFIG['charset'],
-                cursorclass=pymysql.cursors.DictCursor
-            )
-            logger.info("MySQL连接已建立")
+            yield connection
+        finally:
+            if getattr(connection, "open", True):
+                self._idle.put(connection)
+            else:
+                with self._lock:
+                    self._created -= 1
+
+    def close(self) -> None:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except Exception:
+                pass
+        with self._lock:
+            self._created = 0
+
+class ReplicaRouter:
+    """只读副本路由器
+
+    读请求在健康副本间轮询，复制延迟超过阈值或连接失败的副本会被临时排除；
+    同一会话写入后的短时间内，读请求固定走主库以保证读己之写。
+    """
+
+    def __init__(self, hosts: List[str], max_lag_seconds: int, lag_check_interval: int, sticky_seconds: int):
+        self.endpoints = []
+        for host in hosts:
+            name, _, port = host.partition(":")
+            self.endpoints.append((name, int(port) if port else MYSQL_CONFIG['port']))
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.sticky_seconds = sticky_seconds
+        self._lag_checked: Dict[Tuple[str, int], Tuple[bool, float]] = {}
+        # 按写入时间排序，只保留读己之写窗口内的会话
+        self._last_writes: Dict[Optional[str], float] = OrderedDict()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def mark_write(self, session_id: Optional[str]) -> None:
+        """记录会话的写入时间，并清理已过窗口的会话"""
+        now = time.monotonic()
+        with self._lock:
+            self._last_writes[session_id] = now
+            self._last_writes.move_to_end(session_id)
+            self._expire_writes(now)
+
+    def _expire_writes(self, now: float) -> None:
+        while self._last_writes:
+            session_id, last_write = next(iter(self._last_writes.items()))
+            if now - last_write < self.sticky_seconds:
+                break
+            del self._last_writes[session_id]
+
+    def _is_sticky(self, session_id: Optional[str]) -> bool:
+        with self._lock:
+            self._expire_writes(time.monotonic())
+            return session_id in self._last_writes
+
+    def _replica_lag(self, connection) -> Optional[float]:
+        """读取副本复制延迟，复制未运行时返回None"""
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Exception:
+                # MySQL 8.0.22 之前的版本
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+        if not status:
+            return None
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    def _is_healthy(self, endpoint: Tuple[str, int], pool: ConnectionPool) -> bool:
+        """按检查间隔刷新副本健康状态"""
+        now = time.monotonic()
+        healthy, checked_at = self._lag_checked.get(endpoint, (True, 0.0))
+        if checked_at and now - checked_at < self.lag_check_interval:
+            return healthy
+
+        try:
+            with pool.connection() as connection:
+                lag = self._replica_lag(connection)
+            healthy = lag is not None and lag <= self.max_lag_seconds
+            if not healthy:
+                logger.warning(f"副本 {endpoint[0]}:{endpoint[1]} 延迟 {lag} 秒，暂时排除")
         except Exception as e:
-            logger.error(f"MySQL连接失败: {e}")
-            raise e
-    
-    return _mysql_connection
+            logger.warning(f"副本 {endpoint[0]}:{endpoint[1]} 不可用: {e}")
+            healthy = False
+        self._lag_checked[endpoint] = (healthy, now)
+        return healthy
+
+    def choose_endpoint(self, session_id: Optional[str], pool_for: Callable[[Tuple[str, int]], ConnectionPool]) -> Optional[Tuple[str, int]]:
+        """选择读请求的副本节点，返回None表示使用主库"""
+        if not self.endpoints or self._is_sticky(session_id):
+            return None
+        for _ in range(len(self.endpoints)):
+            with self._lock:
+                endpoint = self.endpoints[self._next % len(self.endpoints)]
+                self._next += 1
+            if self._is_healthy(endpoint, pool_for(endpoint)):
+                return endpoint
+        return None
+
+    def reset(self) -> None:
+        self._lag_checked.clear()
+
+# ===== 数据库后端 =====
+class DatabaseBackend:
+    """数据库后端接口
+
+    工具通过后端借出连接并获取元数据，连接需提供与pymysql DictCursor一致的
+    cursor()上下文管理器（execute/fetchone/fetchall/rowcount，%s占位符）。
+    """
+
+    name = "base"
+
+    def initialize(self) -> bool:
+        """建立连接并检查可用性"""
+        raise NotImplementedError
+
+    def connection(self, session_id: Optional[str] = None, write: bool = False) -> ContextManager[Any]:
+        """借出连接的上下文管理器，write=True时使用可写节点"""
+        raise NotImplementedError
+
+    def mark_write(self, session_id: Optional[str]) -> None:
+        """记录会话写入，用于读己之写"""
+
+    def list_tables(self, cursor) -> List[str]:
+        raise NotImplementedError
+
+    def describe_table(self, cursor, table: str) -> List[Dict]:
+        """返回MySQL DESCRIBE格式的列信息 (Field/Type/Null/Key/Default/Extra)"""
+        raise NotImplementedError
+
+    def explain(self, cursor, sql: str, params: Optional[List] = None) -> Optional[Dict[str, Any]]:
+        """返回执行计划汇总，不支持时返回None"""
+        return None
+
+    def close(self) -> None:
+        pass
+
+class MySQLBackend(DatabaseBackend):
+    """基于pymysql的MySQL后端
+
+    每个节点（主库和各副本）维护一个连接池，读请求经副本路由选择节点。
+
+    Args:
+        pool_size: 每个节点的连接数，默认读取 MYSQL_POOL_SIZE；为1时即共享单连接
+    """
+
+    name = "mysql"
+
+    def __init__(self, pool_size: Optional[int] = None):
+        self.pool_size = pool_size or int(os.environ.get("MYSQL_POOL_SIZE", "1"))
+        self._primary = (MYSQL_CONFIG['host'], MYSQL_CONFIG['port'])
+        self._router = ReplicaRouter(**REPLICA_CONFIG)
+        self._pools: Dict[Tuple[str, int], ConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+
+    def _pool(self, endpoint: Tuple[str, int]) -> ConnectionPool:
+        with self._pools_lock:
+            pool = self._pools.get(endpoint)
+            if pool is None:
+                pool = ConnectionPool(lambda: _connect(*endpoint), self.pool_size)
+                self._pools[endpoint] = pool
+            return pool
+
+    def initialize(self) -> bool:
+        if not MYSQL_AVAILABLE:
+            logger.error("MySQL客户端库未安装")
+            return False
+        try:
+            with self.connection(write=True) as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    result = cursor.fetchone()
+            logger.info(f"MySQL连接初始化成功，连接池大小: {self.pool_size}，测试结果: {result}")
+            return True
+        except Exception as e:
+            logger.error(f"MySQL连接初始化失败: {e}")
+            return False
+
+    @contextmanager
+    def connection(self, session_id: Optional[str] = None, write: bool = False):
+        endpoint = None if write else self._router.choose_endpoint(session_id, self._pool)
+        with self._pool(endpoint or self._primary).connection() as connection:
+            yield connection
+
+    def mark_write(self, session_id: Optional[str]) -> None:
+        self._router.mark_write(session_id)
+
+    def list_tables(self, cursor) -> List[str]:
+        cursor.execute("SHOW TABLES")
+        # 不同MySQL版本返回的键名可能不同，取第一个值（表名）
+        return [list(table.values())[0] for table in cursor.fetchall()]
+
+    def describe_table(self, cursor, table: str) -> List[Dict]:
+        cursor.execute(f"DESCRIBE {table}")
+        return cursor.fetchall()
+
+    def explain(self, cursor, sql: str, params: Optional[List] = None) -> Optional[Dict[str, Any]]:
+        return explain_query(cursor, sql, params)
+
+    def close(self) -> None:
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+        self._router.reset()
+        logger.info("MySQL连接池已关闭")
+
+_database_backend: Optional[DatabaseBackend] = None
+
+def create_database_backend(name: Optional[str] = None, **kwargs) -> DatabaseBackend:
+    """按名称创建后端: mysql（默认）、sqlite、duckdb，未指定时读取 DB_BACKEND 环境变量"""
+    name = (name or os.environ.get("DB_BACKEND", "mysql")).lower()
+    if name == "mysql":
+        return MySQLBackend(**kwargs)
+    if name in ("sqlite", "duckdb"):
+        from .embedded_backend import EmbeddedBackend
+        kwargs.setdefault("database", os.environ.get("DB_EMBEDDED_PATH", ":memory:"))
+        return EmbeddedBackend(engine=name, **kwargs)
+    raise ValueError(f"未知的数据库后端: {name}")
+
+def get_database_backend() -> DatabaseBackend:
+    """获取当前数据库后端"""
+    global _database_backend
+    if _database_backend is None:
+        _database_backend = create_database_backend()
+    return _database_backend
+
+def set_database_backend(backend: DatabaseBackend) -> None:
+    """切换数据库后端（例如离线测试时使用嵌入式数据库）"""
+    global _database_backend
+    if _database_backend is not None and _database_backend is not backend:
+        _database_backend.close()
+    _database_backend = backend
+
+# ===== 查询预检 =====
+# 语句末尾（锁定子句之前）的LIMIT，数值可以是字面量或占位符
+_LIMIT_PATTERN = re.compile(
+    r"\bLIMIT\s+(\d+|%s|\?)(\s*(,|\bOFFSET\b)\s*(\d+|%s|\?))?\s*$", re.IGNORECASE
+)
+# 锁定子句必须位于LIMIT之后
+_LOCKING_CLAUSE_PATTERN = re.compile(
+    r"\s(FOR\s+(UPDATE|SHARE)\b.*|LOCK\s+IN\s+SHARE\s+MODE)\s*$", re.IGNORECASE | re.DOTALL
+)
+# 聚合、分组、去重和UNION需要读完所有输入行，追加LIMIT不会减少扫描量
+_AGGREGATE_PATTERN = re.compile(
+    r"\b(COUNT|SUM|AVG|MIN|MAX|GROUP_CONCAT|STD|STDDEV|VARIANCE|VAR_POP|VAR_SAMP|BIT_AND|BIT_OR|BIT_XOR"
+    r"|JSON_ARRAYAGG|JSON_OBJECTAGG)\s*\(|\bGROUP\s+BY\b|\bDISTINCT\b|\bHAVING\b|\bUNION\b",
+    re.IGNORECASE
+)
+
+def mask_sql_literals(sql: str) -> str:
+    """把字符串、引号标识符和注释的内容替换为空格，返回与原文等长的文本
+
+    用于在不受字面量干扰的情况下匹配关键字、占位符和语句结尾。
+    """
+    masked = list(sql)
+    i, n = 0, len(sql)
+    while i < n:
+        char = sql[i]
+        if char in "'\"`":
+            j = i + 1
+            while j < n:
+                if sql[j] == "\\" and char != "`":
+                    j += 2
+                    continue
+                if sql[j] == char:
+                    if j + 1 < n and sql[j + 1] == char:
+                        # 连续两个引号是转义
+                        j += 2
+                        continue
+                    break
+                j += 1
+            end = min(j, n)
+            masked[i + 1:end] = " " * (end - i - 1)
+            i = end + 1
+        elif char == "#" or (sql.startswith("--", i) and (i + 2 >= n or sql[i + 2].isspace())):
+            end = sql.find("\n", i)
+            end = n if end < 0 else end
+            masked[i:end] = " " * (end - i)
+            i = end
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            masked[i:end] = " " * (end - i)
+            i = end
+        else:
+            i += 1
+    return "".join(masked)
+
+def _collect_plan_tables(node, tables: List[Dict]) -> None:
+    """递归收集EXPLAIN JSON中的table节点（按嵌套循环顺序）"""
+    if isinstance(node, dict):
+        if "table" in node and isinstance(node["table"], dict):
+            tables.append(node["table"])
+        for key, value in node.items():
+            if key == "table" and isinstance(value, dict):
+                # 物化子查询挂在table节点下
+                _collect_plan_tables(value.get("materialized_from_subquery"), tables)
+            else:
+                _collect_plan_tables(value, tables)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_plan_tables(item, tables)
+
+def explain_query(cursor, sql: str, params: Optional[List] = None) -> Dict[str, Any]:
+    """执行EXPLAIN FORMAT=JSON并汇总执行计划
+
+    Returns:
+        包含 query_cost、rows_examined、full_scans、join_buffers、tables 的字典
+    """
+    cursor.execute(f"EXPLAIN FORMAT=JSON {sql}", params or None)
+    row = cursor.fetchone()
+    plan = json.loads(list(row.values())[0] if isinstance(row, dict) else row[0])
+    query_block = plan.get("query_block", {})
+
+    tables: List[Dict] = []
+    _collect_plan_tables(query_block, tables)
+
+    # rows_produced_per_join 是截至当前表的累计连接行数，
+    # 因此当前表的扫描总量 ≈ 上一张表产出行数 × 本表每次扫描行数
+    rows_examined = 0
+    fanout = 1
+    full_scans, join_buffers, table_summaries = [], [], []
+    for table in tables:
+        per_scan = int(table.get("rows_examined_per_scan", 0) or 0)
+        produced = int(table.get("rows_produced_per_join", per_scan) or 0)
+        rows_examined += fanout * per_scan
+        fanout = max(produced, 1)
+
+        name = table.get("table_name", "?")
+        access_type = table.get("access_type", "")
+        if access_type == "ALL":
+            full_scans.append(name)
+        if table.get("using_join_buffer"):
+            join_buffers.append(name)
+        table_summaries.append({
+            "table": name,
+            "access_type": access_type,
+            "key": table.get("key"),
+            "possible_keys": table.get("possible_keys"),
+            "rows_examined_per_scan": per_scan,
+        })
+
+    return {
+        "query_cost": float(query_block.get("cost_info", {}).get("query_cost", 0) or 0),
+        "rows_examined": rows_examined,
+        "full_scans": full_scans,
+        "join_buffers": join_buffers,
+        "tables": table_summaries,
+    }
+
+def format_plan_summary(summary: Dict[str, Any]) -> str:
+    """将执行计划汇总格式化为供Agent阅读的文本"""
+    lines = [
+        f"- 预估成本: {summary['query_cost']:.2f}",
+        f"- 预估扫描行数: {summary['rows_examined']}",
+    ]
+    if summary["full_scans"]:
+        lines.append(f"- 全表扫描: {', '.join(summary['full_scans'])}")
+    if summary["join_buffers"]:
+        lines.append(f"- 无索引连接(可能产生笛卡尔积): {', '.join(summary['join_buffers'])}")
+    for table in summary["tables"]:
+        lines.append(
+            f"- 表 {table['table']}: 访问方式={table['access_type']}, "
+            f"使用索引={table['key'] or '无'}, 可用索引={', '.join(table['possible_keys'] or []) or '无'}, "
+            f"每次扫描行数={table['rows_examined_per_scan']}"
+        )
+    return "\n".join(lines)
+
+def guard_query(
+    cursor, sql: str, params: Optional[List] = None,
+    explain: Callable[..., Optional[Dict[str, Any]]] = explain_query
+) -> Tuple[Optional[str], str]:
+    """根据成本预算检查查询
+
+    Args:
+        explain: 生成执行计划汇总的函数，返回None时跳过检查
+
+    Returns:
+        (实际执行的SQL, 说明文本)。SQL为None表示查询被拒绝。
+    """
+    if not QUERY_GUARD_CONFIG["enabled"]:
+        return sql, ""
+
+    # 去掉末尾的注释和分号；EXPLAIN的扫描行数不考虑LIMIT，已带LIMIT的查询视为有界
+    masked = mask_sql_literals(sql)
+    end = len(masked)
+    while end and masked[end - 1] in " \t\r\n;":
+        end -= 1
+    body, masked_body = sql[:end], masked[:end]
+    lock_clause = _LOCKING_CLAUSE_PATTERN.search(masked_body)
+    split = lock_clause.start() if lock_clause else len(body)
+    if _LIMIT_PATTERN.search(masked_body[:split]):
+        return sql, ""
 
-def initialize_mysql_connection():
-    """初始化MySQL连接并保持打开状态"""
     try:
-        connection = get_mysql_connection()
-        # 测试连接
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            result = cursor.fetchone()
-        logger.info(f"MySQL连接初始化成功，测试结果: {result}")
-        return True
+        summary = explain(cursor, sql, params)
     except Exception as e:
-        logger.error(f"MySQL连接初始化失败: {e}")
-        return False
+        # EXPLAIN失败时不阻塞查询，交由真实执行返回错误
+        logger.warning(f"EXPLAIN预检失败，跳过成本检查: {e}")
+        return sql, ""
+    if summary is None:
+        return sql, ""
+
+    budget = QUERY_GUARD_CONFIG["max_rows_examined"]
+    if summary["rows_examined"] <= budget:
+        return sql, ""
+
+    plan_text = format_plan_summary(summary)
+    if QUERY_GUARD_CONFIG["action"] == "limit" and not _AGGREGATE_PATTERN.search(masked_body):
+        limit = QUERY_GUARD_CONFIG["default_limit"]
+        note = (
+            f"**查询预检:** 预估扫描 {summary['rows_examined']} 行，超过预算 {budget}，"
+            f"已自动追加 LIMIT {limit}。\n{plan_text}\n\n"
+        )
+        return f"{body[:split].rstrip()} LIMIT {limit}{body[split:]}", note
+
+    if _AGGREGATE_PATTERN.search(masked_body):
+        plan_text = "聚合、分组、去重或UNION查询需要读取全部匹配行，追加LIMIT无法降低扫描量。\n\n" + plan_text
+    note = (
+        f"错误: 查询预估扫描 {summary['rows_examined']} 行，超过预算 {budget}，已拒绝执行。\n"
+        f"请添加WHERE条件、使用索引列过滤或缩小查询范围后重试。\n\n"
+        f"**执行计划:**\n{plan_text}"
+    )
+    return None, note
+
+# ===== 结果编码 =====
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数：中文约1字1token，其余约4字符1token"""
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+def _cell(value: Any) -> str:
+    return "NULL" if value is None else str(value)
 
-def close_mysql_connection():
-    """关闭MySQL连接"""
-    global _mysql_connection
-    if _mysql_connection:
-        _mysql_connection.close()
-        _mysql_connection = None
-        logger.info("MySQL连接已关闭")
+def encode_markdown(columns: List[str], rows: List[Dict]) -> str:
+    """Markdown表格，适合少量行的直接展示"""
+    buffer = io.StringIO()
+    buffer.write("| " + " | ".join(columns) + " |\n")
+    buffer.write("| " + " | ".join(["---"] * len(columns)) + " |\n")
+    for row in rows:
+        values = (_cell(row[col]).replace("|", "\\|").replace("\n", " ") for col in columns)
+        buffer.write("| " + " | ".join(values) + " |\n")
+    return buffer.getvalue()
+
+def _encode_delimited(columns: List[str], rows: List[Dict], delimiter: str, fence: str) -> str:
+    buffer = io.StringIO()
+    buffer.write(f"```{fence}\n")
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows([_cell(row[col]) for col in columns] for row in rows)
+    buffer.write("```\n")
+    return buffer.getvalue()
+
+def encode_csv(columns: List[str], rows: List[Dict]) -> str:
+    """列头+逐行CSV，列名只出现一次"""
+    return _encode_delimited(columns, rows, ",", "csv")
+
+def encode_tsv(columns: List[str], rows: List[Dict]) -> str:
+    """列头+逐行TSV，比CSV更少需要引号转义"""
+    return _encode_delimited(columns, rows, "\t", "tsv")
+
+def encode_json(columns: List[str], rows: List[Dict]) -> str:
+    """紧凑JSON：列名数组 + 行值数组，不重复键名"""
+    payload = {"columns": columns, "rows": [[row[col] for col in columns] for row in rows]}
+    return "```json\n" + json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str) + "\n```\n"
+
+RESULT_ENCODERS: Dict[str, Callable[[List[str], List[Dict]], str]] = {
+    "markdown": encode_markdown,
+    "csv": encode_csv,
+    "tsv": encode_tsv,
+    "json": encode_json,
+}
+
+def register_result_encoder(name: str, encoder: Callable[[List[str], List[Dict]], str]) -> None:
+    """注册自定义结果编码器"""
+    RESULT_ENCODERS[name] = encoder
+
+def encode_query_result(columns: List[str], rows: List[Dict], result_format: str = "auto", max_tokens: int = 0) -> str:
+    """按指定格式编码查询结果，并在超出token预算时截断行
+
+    Args:
+        columns: 列名
+        rows: 结果行
+        result_format: 编码格式，auto表示≤10行用markdown，否则用tsv
+        max_tokens: token预算，0表示不限制
+    """
+    if result_format == "auto":
+        result_format = "markdown" if len(rows) <= 10 else "tsv"
+    encoder = RESULT_ENCODERS.get(result_format)
+    if encoder is None:
+        raise ValueError(f"未知的结果编码格式: {result_format}")
+
+    text = encoder(columns, rows)
+    if not max_tokens or len(rows) <= 1:
+        return text
+
+    tokens = estimate_tokens(text)
+    shown = len(rows)
+    # 按比例收缩行数，通常一到两次即可落入预算
+    while tokens > max_tokens and shown > 1:
+        shown = max(1, min(shown - 1, int(shown * max_tokens / tokens)))
+        text = encoder(columns, rows[:shown])
+        tokens = estimate_tokens(text)
+
+    if shown < len(rows):
+        text += f"\n(结果超出token预算，仅显示前{shown}行，共{len(rows)}行；请使用更精确的条件或聚合查询)\n"
+    return text
 
 # ===== 工具实现 =====
 class QueryTool(MySQLTool):
     """SQL查询工具"""
     
-    async def run(self, args: QueryInput, cancellation_token: CancellationToken) -> str:
+    def _run(self, args: QueryInput) -> str:
         """执行SELECT查询"""
         if not args.sql.strip().upper().startswith("SELECT"):
             return "错误: 此工具只允许执行SELECT查询语句"
         
         try:
-            connection = get_mysql_connection()
-            
-            with connection.cursor() as cursor:
+            backend = get_database_backend()
+            with backend.connection(self.tool_params.session_id) as connection, connection.cursor() as cursor:
+                # 执行前预检查询成本
+                sql, guard_note = guard_query(cursor, args.sql, args.params, explain=backend.explain)
+                if sql is None:
+                    return guard_note
+
                 if args.params:
-                    cursor.execute(args.sql, args.params)
+                    cursor.execute(sql, args.params)
                 else:
-                    cursor.execute(args.sql)
-                
+                    cursor.execute(sql)
+
                 results = cursor.fetchall()
-                
+
                 if not results:
-                    return "查询完成，返回0行记录"
-                
+                    return guard_note + "查询完成，返回0行记录"
+
                 # 格式化结果
-                result_text = f"## 查询结果 (共{len(results)}行)\n\n"
-                
-                # 如果结果较少，显示为表格
-                if len(results) <= 10:
-                    if results:
-                        # 获取列名
-                        columns = list(results[0].keys())
-                        
-                        # 创建表格标题
-                        result_text += "| " + " | ".join(columns) + " |\n"
-                        result_text += "| " + " | ".join(["---"] * len(columns)) + " |\n"
-                        
-                        # 添加数据行
-                        for row in results:
-                            values = [str(row[col]) if row[col] is not None else "NULL" for col in columns]
-                            result_text += "| " + " | ".join(values) + " |\n"
-                else:
-                    # 结果较多时，显示为JSON
-                    result_text += "```json\n"
-                    result_text += json.dumps(results, ensure_ascii=False, indent=2, default=str)
-                    result_text += "\n```"
-                
+                columns = list(results[0].keys())
+                body = encode_query_result(
+                    columns, results, self.tool_params.result_format, self.tool_params.max_result_tokens
+                )
+                result_text = guard_note + f"## 查询结果 (共{len(results)}行)\n\n" + body
+
                 return result_text
                 
         except Exception as e:
@@ -203,7 +809,7 @@ class QueryTool(MySQLTool):
 class ExecuteTool(MySQLTool):
     """SQL执行工具"""
     
-    async def run(self, args: ExecuteInput, cancellation_token: CancellationToken) -> str:
+    def _run(self, args: ExecuteInput) -> str:
         """执行INSERT/UPDATE/DELETE语句"""
         # 检查SQL类型
         sql_upper = args.sql.strip().upper()
@@ -211,18 +817,22 @@ class ExecuteTool(MySQLTool):
             return "错误: 此工具只允许执行INSERT、UPDATE、DELETE语句"
         
         try:
-            connection = get_mysql_connection()
+            backend = get_database_backend()
+            with backend.connection(self.tool_params.session_id, write=True) as connection:
+                try:
+                    with connection.cursor() as cursor:
+                        if args.params:
+                            cursor.execute(args.sql, args.params)
+                        else:
+                            cursor.execute(args.sql)
+                        affected_rows = cursor.rowcount
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+            backend.mark_write(self.tool_params.session_id)
             
-            with connection.cursor() as cursor:
-                if args.params:
-                    cursor.execute(args.sql, args.params)
-                else:
-                    cursor.execute(args.sql)
-                
-                affected_rows = cursor.rowcount
-                connection.commit()
-                
-                return f"""
+            return f"""
 ## SQL执行成功
 
 - 执行语句: {args.sql[:100]}{"..." if len(args.sql) > 100 else ""}
@@ -232,31 +842,21 @@ class ExecuteTool(MySQLTool):
                 
         except Exception as e:
             logger.error(f"SQL执行失败: {e}")
-            connection.rollback()
             return f"SQL执行失败: {str(e)}"
 
 class ListTablesTool(MySQLTool):
     """列举数据库表工具"""
     
-    async def run(self, args: TablesInput, cancellation_token: CancellationToken) -> str:
+    def _run(self, args: TablesInput) -> str:
         """列举数据库中的所有表"""
         try:
-            connection = get_mysql_connection()
-            
-            with connection.cursor() as cursor:
-                cursor.execute("SHOW TABLES")
-                tables = cursor.fetchall()
+            backend = get_database_backend()
+            with backend.connection(self.tool_params.session_id) as connection, connection.cursor() as cursor:
+                table_names = backend.list_tables(cursor)
                 
-                if not tables:
+                if not table_names:
                     return "数据库中没有找到任何表"
                 
-                # 获取表名（不同MySQL版本返回的键名可能不同）
-                table_names = []
-                for table in tables:
-                    # 获取第一个值（表名）
-                    table_name = list(table.values())[0]
-                    table_names.append(table_name)
-                
                 result_text = f"## 数据库表列表 (共{len(table_names)}个表)\n\n"
                 
                 for i, table_name in enumerate(table_names, 1):
@@ -271,15 +871,12 @@ class ListTablesTool(MySQLTool):
 class DescribeTableTool(MySQLTool):
     """查看表结构工具"""
     
-    async def run(self, args: TableSchemaInput, cancellation_token: CancellationToken) -> str:
+    def _run(self, args: TableSchemaInput) -> str:
         """查看指定表的结构信息"""
         try:
-            connection = get_mysql_connection()
-            
-            with connection.cursor() as cursor:
-                # 使用DESCRIBE或SHOW COLUMNS查看表结构
-                cursor.execute(f"DESCRIBE {args.table}")
-                columns = cursor.fetchall()
+            backend = get_database_backend()
+            with backend.connection(self.tool_params.session_id) as connection, connection.cursor() as cursor:
+                columns = backend.describe_table(cursor, args.table)
                 
                 if not columns:
                     return f"表 {args.table} 不存在或没有列信息"
@@ -315,40 +912,55 @@ class DescribeTableTool(MySQLTool):
             return f"获取表结构失败: {str(e)}"
 
 # ===== 工具创建函数 =====
-def create_mysql_tools():
-    """创建所有MySQL工具"""
+def create_mysql_tools(result_format: str = "auto", max_result_tokens: int = 2000, session_id: Optional[str] = None):
+    """创建所有MySQL工具
+
+    Args:
+        result_format: query工具的结果编码格式 (auto/markdown/csv/tsv/json)
+        max_result_tokens: query工具结果的token预算
+        session_id: Agent会话标识，同一会话的工具共享读己之写状态
+    """
     # 首先初始化数据库连接
-    if not initialize_mysql_connection():
-        logger.error("MySQL连接初始化失败，无法创建工具")
+    if not get_database_backend().initialize():
+        logger.error("数据库连接初始化失败，无法创建工具")
         return []
     
     return [
         QueryTool(
             name="query",
             input_model=QueryInput,
-            description="执行SELECT查询语句"
+            description="执行SELECT查询语句",
+            result_format=result_format,
+            max_result_tokens=max_result_tokens,
+            session_id=session_id
         ),
         ExecuteTool(
             name="execute",
             input_model=ExecuteInput,
-            description="执行INSERT/UPDATE/DELETE语句"
+            description="执行INSERT/UPDATE/DELETE语句",
+            session_id=session_id
         ),
         ListTablesTool(
             name="list_tables",
             input_model=TablesInput,
-            description="列举数据库中的所有表"
+            description="列举数据库中的所有表",
+            session_id=session_id
         ),
         DescribeTableTool(
             name="describe_table",
             input_model=TableSchemaInput,
-            description="查看指定表的结构信息"
+            description="查看指定表的结构信息",
+            session_id=session_id
         )
     ]
 
 # ===== 测试函数 =====
 async def test_mysql_tools():
     """测试MySQL工具"""
-    if not MYSQL_AVAILABLE:
+    global _database_backend
+    # 只清理本次测试自己创建的后端，Web服务等共享的后端保持打开
+    owns_backend = _database_backend is None
+    if isinstance(get_database_backend(), MySQLBackend) and not MYSQL_AVAILABLE:
         print("❌ MySQL客户端库未安装")
         return False
     
@@ -390,7 +1002,9 @@ async def test_mysql_tools():
         return False
     finally:
         # 清理连接
-        close_mysql_connection()
+        if owns_backend and _database_backend is not None:
+            _database_backend.close()
+            _database_backend = None
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+测试嵌入式后端的占位符转换
+"""
+
+import os
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../..')
+sys.path.append(project_root)
+
+from AiCraftTest.mcptools.embedded_backend import EmbeddedBackend, translate_placeholders
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM users WHERE id = %s", "SELECT * FROM users WHERE id = ?"),
+    ("SELECT '%s', %s", "SELECT '%s', ?"),
+    ('SELECT "a%sb" FROM t WHERE x = %s', 'SELECT "a%sb" FROM t WHERE x = ?'),
+    ("SELECT 'it''s %s', %s -- %s\n", "SELECT 'it''s %s', ? -- %s\n"),
+    ("SELECT * FROM t WHERE name LIKE '100%%' AND id = %s", "SELECT * FROM t WHERE name LIKE '100%' AND id = ?"),
+    ("SELECT 5 %% 2, %s", "SELECT 5 % 2, ?"),
+])
+def test_translate_placeholders(sql, expected):
+    assert translate_placeholders(sql) == expected
+
+
+def test_literal_placeholder_survives_execution():
+    backend = EmbeddedBackend(engine="sqlite", seed=False)
+    try:
+        with backend.connection(write=True) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT '%s' AS literal, %s AS value", [42])
+                assert cursor.fetchone() == {"literal": "%s", "value": 42}
+    finally:
+        backend.close()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+测试查询预检（guard_query）的LIMIT处理
+"""
+
+import os
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../..')
+sys.path.append(project_root)
+
+from AiCraftTest.mcptools import mysql_tools
+from AiCraftTest.mcptools.mysql_tools import guard_query, mask_sql_literals
+
+
+def expensive_plan(cursor, sql, params=None):
+    return {
+        "query_cost": 50000.0,
+        "rows_examined": 5_000_000,
+        "full_scans": ["orders"],
+        "join_buffers": [],
+        "tables": [],
+    }
+
+
+def failing_explain(cursor, sql, params=None):
+    raise AssertionError("已带LIMIT的查询不应再执行EXPLAIN")
+
+
+@pytest.fixture(autouse=True)
+def guard_config(monkeypatch):
+    monkeypatch.setitem(mysql_tools.QUERY_GUARD_CONFIG, "enabled", True)
+    monkeypatch.setitem(mysql_tools.QUERY_GUARD_CONFIG, "action", "limit")
+    monkeypatch.setitem(mysql_tools.QUERY_GUARD_CONFIG, "max_rows_examined", 100000)
+    monkeypatch.setitem(mysql_tools.QUERY_GUARD_CONFIG, "default_limit", 1000)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM orders LIMIT 10",
+    "SELECT * FROM orders LIMIT 10;",
+    "SELECT * FROM orders LIMIT 10, 20",
+    "SELECT * FROM orders LIMIT 10 OFFSET 20 -- page 3",
+    "SELECT * FROM orders LIMIT %s",
+    "SELECT * FROM orders LIMIT %s OFFSET %s",
+    "SELECT * FROM orders LIMIT 10 FOR UPDATE",
+])
+def test_existing_limit_is_bounded(sql):
+    assert guard_query(None, sql, explain=failing_explain) == (sql, "")
+
+
+def test_limit_inside_subquery_or_string_is_not_a_bound():
+    sql, note = guard_query(None, "SELECT * FROM (SELECT * FROM orders LIMIT 5) t, users", explain=expensive_plan)
+    assert sql.endswith(" LIMIT 1000") and note
+    sql, note = guard_query(None, "SELECT * FROM orders WHERE note = 'LIMIT 5'", explain=expensive_plan)
+    assert sql == "SELECT * FROM orders WHERE note = 'LIMIT 5' LIMIT 1000"
+
+
+def test_limit_appended_after_stripping_comments_and_semicolon():
+    sql, _ = guard_query(None, "SELECT * FROM orders WHERE status = 'paid'; -- all paid orders", explain=expensive_plan)
+    assert sql == "SELECT * FROM orders WHERE status = 'paid' LIMIT 1000"
+    sql, _ = guard_query(None, "SELECT * FROM orders /* everything */", explain=expensive_plan)
+    assert sql == "SELECT * FROM orders LIMIT 1000"
+
+
+def test_limit_inserted_before_locking_clause():
+    sql, _ = guard_query(None, "SELECT * FROM orders WHERE user_id = %s FOR UPDATE", [1], explain=expensive_plan)
+    assert sql == "SELECT * FROM orders WHERE user_id = %s LIMIT 1000 FOR UPDATE"
+    sql, _ = guard_query(None, "SELECT * FROM orders LOCK IN SHARE MODE;", explain=expensive_plan)
+    assert sql == "SELECT * FROM orders LIMIT 1000 LOCK IN SHARE MODE"
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(*) FROM orders",
+    "SELECT user_id, SUM(total_amount) FROM orders GROUP BY user_id",
+    "SELECT DISTINCT city FROM users",
+    "SELECT id FROM orders UNION SELECT id FROM users",
+])
+def test_aggregates_are_rejected_not_mitigated(sql):
+    guarded, note = guard_query(None, sql, explain=expensive_plan)
+    assert guarded is None
+    assert note.startswith("错误") and "追加LIMIT无法降低扫描量" in note
+
+
+def test_reject_action(monkeypatch):
+    monkeypatch.setitem(mysql_tools.QUERY_GUARD_CONFIG, "action", "reject")
+    guarded, note = guard_query(None, "SELECT * FROM orders", explain=expensive_plan)
+    assert guarded is None and note.startswith("错误")
+
+
+def test_mask_sql_literals_keeps_length_and_hides_literals():
+    sql = "SELECT 'a;--b', `LIMIT` FROM t # LIMIT 5\nWHERE x = \"it''s\" /* c */"
+    masked = mask_sql_literals(sql)
+    assert len(masked) == len(sql)
+    assert "LIMIT" not in masked and "--" not in masked
+    assert masked.startswith("SELECT '") and "WHERE x =" in masked
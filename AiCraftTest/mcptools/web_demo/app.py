@@ -4,12 +4,21 @@ MySQL MCP 交互式演示 - Flask Web应用 (集成AutoGen Agent)
 """
 
 import asyncio
+import atexit
+import concurrent.futures
 import json
+import math
+import re
 import logging
 import sys
+import threading
+import time
 import traceback
+import unicodedata
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -22,13 +31,7 @@ sys.path.append(project_root)
 # 加载环境变量
 load_dotenv(os.path.join(project_root, '.env'))
 
-# 导入AutoGen相关组件
-from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_core.models import ModelFamily
-from autogen_agentchat.ui import Console
-
-from AiCraftTest.mcptools.mysql_tools import create_mysql_tools, test_mysql_tools
+# AutoGen/OpenAI及MySQL工具模块导入较慢，在首次使用时再导入，保证进程秒级启动
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)  # 改为INFO级别，减少调试输出
@@ -45,14 +48,461 @@ logging.getLogger('autogen_agentchat.events').setLevel(logging.WARNING)
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
 
-# 全局变量存储MySQL工具和Agent
+# 全局变量存储MySQL工具和Agent池
 mysql_tools = None
 mysql_session = None
-database_agent = None
+agent_pool = None
+
+# Agent池容量，超出后按LRU淘汰最久未使用的会话
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "32"))
+
+# 启动时是否在后台预热模型客户端、数据库连接和表结构缓存
+WARM_START = os.getenv("WEB_DEMO_WARM_START", "true").lower() in ("1", "true", "yes")
+
+# 流式响应的事件队列容量，客户端读取跟不上时Agent流在此暂停（背压）
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))
+# 等待事件超时后发送心跳，以便及时发现客户端断开
+STREAM_KEEPALIVE_SECONDS = 15
+
+# 准入控制：同时运行的Agent查询数、排队上限、单会话配额与单IP配额（运行+排队）
+# 同一NAT出口后的多个用户共享IP，因此IP配额远大于会话配额
+AGENT_MAX_CONCURRENT = int(os.getenv("AGENT_MAX_CONCURRENT", "4"))
+AGENT_MAX_QUEUE = int(os.getenv("AGENT_MAX_QUEUE", "16"))
+AGENT_SESSION_QUOTA = int(os.getenv("AGENT_SESSION_QUOTA", "2"))
+AGENT_IP_QUOTA = int(os.getenv("AGENT_IP_QUOTA", "12"))
+# 排队超时以及包含排队时间在内的单次查询总超时（秒）
+AGENT_QUEUE_TIMEOUT = float(os.getenv("AGENT_QUEUE_TIMEOUT", "30"))
+AGENT_REQUEST_TIMEOUT = float(os.getenv("AGENT_REQUEST_TIMEOUT", "180"))
+
+# /api/execute-tool默认只返回模拟结果；显式开启后也只允许执行只读工具
+EXECUTE_TOOLS_ENABLED = os.getenv("WEB_DEMO_EXECUTE_TOOLS", "false").lower() in ("1", "true", "yes")
+READ_ONLY_TOOLS = frozenset({'query', 'list_tables', 'describe_table'})
+
+# 答案缓存：完整答案的有效期、SQL复用的有效期（秒）、容量，以及参与缓存的问题最短长度（归一化后字符数）
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "300"))
+SQL_CACHE_TTL = float(os.getenv("SQL_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_MIN_CHARS = int(os.getenv("ANSWER_CACHE_MIN_CHARS", "6"))
+
+class BackgroundEventLoop:
+    """后台线程中长期运行的事件循环
+
+    所有路由把协程提交到同一个循环执行，模型客户端的HTTP连接池和工具会话
+    绑定在这个循环上，可以跨请求复用，不再每个请求新建并关闭事件循环。
+    """
+
+    def __init__(self):
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name="agent-event-loop", daemon=True)
+            self._thread.start()
+            logger.info("后台事件循环已启动")
+
+    def submit(self, coro):
+        """提交协程到后台循环，返回concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """在后台循环中执行协程并阻塞等待结果"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def stop(self):
+        with self._lock:
+            if self.loop is None or self._thread is None:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self.loop.close()
+            self.loop = None
+            self._thread = None
+
+background_loop = BackgroundEventLoop()
+atexit.register(background_loop.stop)
+
+def run_async(coro, timeout=None):
+    """Flask同步路由中执行协程的统一入口"""
+    return background_loop.run(coro, timeout)
+
+class ToolRegistry:
+    """按名称索引的工具注册表
+
+    加载时预先计算每个工具的描述和输入模式，查询和执行按名称O(1)查找；
+    重新加载时构建新索引后整体替换。调用耗时由工具自身记录（见mysql_tools.tool_metrics）。
+    """
+
+    def __init__(self):
+        self._tools = {}
+        self._info = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_info(tool):
+        schema = tool.schema
+        return {
+            'name': tool.name,
+            'description': schema.get('description') or tool.description or '无描述',
+            'inputSchema': schema.get('parameters', {}),
+        }
+
+    def load(self, tools):
+        """用新的工具列表替换整个索引"""
+        tools_by_name = {tool.name: tool for tool in tools}
+        info = {name: self._build_info(tool) for name, tool in tools_by_name.items()}
+        with self._lock:
+            self._tools = tools_by_name
+            self._info = info
+
+    def register(self, tool):
+        """注册或替换单个工具"""
+        info = self._build_info(tool)
+        with self._lock:
+            self._tools = {**self._tools, tool.name: tool}
+            self._info = {**self._info, tool.name: info}
+
+    def get(self, name):
+        return self._tools.get(name)
+
+    def info(self, name):
+        return self._info.get(name)
+
+    def list_info(self):
+        return list(self._info.values())
+
+    @property
+    def count(self):
+        return len(self._tools)
+
+    async def execute(self, name, args):
+        """执行工具"""
+        from autogen_core import CancellationToken
+
+        return await self._tools[name].run_json(args, CancellationToken())
+
+    def metrics(self):
+        """各工具的调用统计，包括Agent在自然语言查询中发起的调用"""
+        from AiCraftTest.mcptools.mysql_tools import tool_metrics
+
+        return tool_metrics.snapshot()
+
+tool_registry = ToolRegistry()
+
+class AdmissionRejected(Exception):
+    """查询未被准入，retry_after为建议的重试等待秒数"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Agent查询的准入控制
+
+    最多max_concurrent个查询同时运行，其余按到达顺序（FIFO）排队；队列满、
+    会话或IP超出配额、排队超时时拒绝，并根据平均运行时长估算Retry-After。
+    """
+
+    def __init__(self, max_concurrent, max_queue, session_quota, ip_quota, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.session_quota = session_quota
+        self.ip_quota = ip_quota
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._waiters = deque()
+        self._in_flight = 0
+        self._sessions = {}
+        self._ips = {}
+        # 运行与排队时长的指数滑动平均（秒），初始值为经验估计
+        self._avg_run = 10.0
+        self._avg_wait = 0.0
+        self._counters = {'admitted': 0, 'completed': 0, 'rejected': 0, 'timed_out': 0}
+
+    def _retry_after(self):
+        rounds = len(self._waiters) // max(self.max_concurrent, 1) + 1
+        return max(1, math.ceil(self._avg_run * rounds))
+
+    def _reject(self, message, counter='rejected'):
+        self._counters[counter] += 1
+        return AdmissionRejected(message, self._retry_after())
+
+    @staticmethod
+    def _decrement(counts, key):
+        remaining = counts.get(key, 0) - 1
+        if remaining > 0:
+            counts[key] = remaining
+        else:
+            counts.pop(key, None)
+
+    def _release_client(self, session_key, client_ip):
+        self._decrement(self._sessions, session_key)
+        self._decrement(self._ips, client_ip)
+
+    def acquire(self, session_key, client_ip):
+        """阻塞直到获得运行名额，返回排队耗时（秒）"""
+        with self._condition:
+            if self._sessions.get(session_key, 0) >= self.session_quota:
+                raise self._reject(f'当前会话已有 {self.session_quota} 个查询在运行或排队')
+            if self._ips.get(client_ip, 0) >= self.ip_quota:
+                raise self._reject(f'当前IP已有 {self.ip_quota} 个查询在运行或排队')
+            if self._in_flight >= self.max_concurrent and len(self._waiters) >= self.max_queue:
+                raise self._reject('服务繁忙，查询队列已满')
+            
+            self._sessions[session_key] = self._sessions.get(session_key, 0) + 1
+            self._ips[client_ip] = self._ips.get(client_ip, 0) + 1
+            waiter = object()
+            self._waiters.append(waiter)
+            enqueued_at = time.monotonic()
+            deadline = enqueued_at + self.queue_timeout
+            while self._waiters[0] is not waiter or self._in_flight >= self.max_concurrent:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(waiter)
+                    self._release_client(session_key, client_ip)
+                    self._condition.notify_all()
+                    raise self._reject('排队超时，请稍后重试', 'timed_out')
+                self._condition.wait(remaining)
+            
+            self._waiters.popleft()
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+            waited = time.monotonic() - enqueued_at
+            self._avg_wait = 0.8 * self._avg_wait + 0.2 * waited
+            # 仍有空闲名额时唤醒下一个排队者
+            self._condition.notify_all()
+            return waited
+
+    def release(self, session_key, client_ip, run_seconds):
+        with self._condition:
+            self._in_flight -= 1
+            self._release_client(session_key, client_ip)
+            self._counters['completed'] += 1
+            self._avg_run = 0.8 * self._avg_run + 0.2 * run_seconds
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, session_key, client_ip):
+        """获得名额后执行，产出排队耗时"""
+        waited = self.acquire(session_key, client_ip)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(session_key, client_ip, time.monotonic() - started)
+
+    def metrics(self):
+        with self._condition:
+            return {
+                'in_flight': self._in_flight,
+                'queued': len(self._waiters),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'avg_wait_ms': round(self._avg_wait * 1000, 1),
+                'avg_run_ms': round(self._avg_run * 1000, 1),
+                **self._counters
+            }
+
+# 依赖上文的追问（"那上个月呢"、"what about last month"），答案随对话上下文变化，不参与缓存
+_FOLLOW_UP_PATTERN = re.compile(
+    r'^(那|那么|还有|再|另外|同样|换成|按照?刚才)|呢$|(上面|刚才|之前|上述|这些|那些|它们|他们|前者|后者)'
+    r'|^(what|how) about\b|^(and|also|same)\b|\b(them|those|these|previous|above)\b',
+    re.IGNORECASE
+)
+
+def normalize_question(text):
+    """归一化问题文本：全角转半角、小写、去掉空白和标点"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return re.sub(r'[\W_]+', '', text)
+
+def is_cacheable_question(question):
+    """过短或依赖对话上下文的问题不缓存"""
+    text = unicodedata.normalize('NFKC', question).strip().lower().rstrip('?？!！。.')
+    if len(normalize_question(text)) < ANSWER_CACHE_MIN_CHARS:
+        return False
+    return not _FOLLOW_UP_PATTERN.search(text)
+
+def extract_tool_rounds(messages):
+    """从Agent消息中按轮次提取已执行的工具调用
+
+    Returns:
+        每轮一个列表，元素为(name, arguments, succeeded)
+    """
+    from AiCraftTest.mcptools.mysql_tools import TOOL_ERROR_PREFIXES
+
+    requested = {}
+    rounds = []
+    for message in messages:
+        kind = type(message).__name__
+        if kind == 'ToolCallRequestEvent':
+            for call in message.content:
+                try:
+                    arguments = json.loads(call.arguments) if call.arguments else {}
+                except ValueError:
+                    arguments = {}
+                requested[call.id] = (call.name, arguments)
+        elif kind == 'ToolCallExecutionEvent':
+            calls = []
+            for result in message.content:
+                name, arguments = requested.pop(result.call_id, (result.name, {}))
+                succeeded = not result.is_error and not str(result.content).lstrip().startswith(TOOL_ERROR_PREFIXES)
+                calls.append((name, arguments, succeeded))
+            rounds.append(calls)
+    return rounds
+
+def final_answer_queries(rounds):
+    """最后一轮包含query调用的成功SQL，即产生最终答案的查询；之前的探索性查询不记录"""
+    for calls in reversed(rounds):
+        queries = [arguments for name, arguments, _ in calls if name == 'query' and arguments.get('sql')]
+        if queries:
+            return [
+                {'sql': arguments['sql'], 'params': arguments.get('params')}
+                for name, arguments, succeeded in calls
+                if name == 'query' and arguments.get('sql') and succeeded
+            ]
+    return []
+
+class AnswerCache:
+    """自然语言问题的答案缓存
+
+    问题归一化（大小写、全半角、空白和标点）后精确匹配，不同会话提出的相同问题共用缓存；
+    依赖上文的追问和过短的问题不缓存（见is_cacheable_question），因此无需按会话隔离。
+    意思相反的问题（"active"与"inactive"）只差一两个字，任何近似匹配都可能返回错误答案，
+    因此不做模糊匹配。
+    命中后在answer_ttl内直接复用完整答案，超过answer_ttl但在sql_ttl内则重新执行产生
+    最终答案的SQL以保证数据新鲜，两者都不调用模型。
+    """
+
+    def __init__(self, answer_ttl, sql_ttl, max_size):
+        self.answer_ttl = answer_ttl
+        self.sql_ttl = sql_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'answer_hits': 0, 'sql_hits': 0, 'misses': 0, 'stores': 0, 'skipped': 0}
+
+    def lookup(self, question):
+        """返回(命中类型, 缓存条目)，命中类型为answer或sql，未命中返回(None, None)"""
+        key = normalize_question(question)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry['stored_at'] > self.sql_ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry['answer'] is not None and now - entry['stored_at'] <= self.answer_ttl:
+                    self._counters['answer_hits'] += 1
+                    return 'answer', entry
+                if entry['queries']:
+                    self._counters['sql_hits'] += 1
+                    return 'sql', entry
+            self._counters['misses'] += 1
+            return None, None
+
+    def store(self, question, answer, messages):
+        """记录一次Agent运行的答案和产生答案的SQL；执行过写操作的运行不缓存，并使已有答案失效"""
+        rounds = extract_tool_rounds(messages)
+        if any(name == 'execute' for calls in rounds for name, _, _ in calls):
+            self.invalidate_answers()
+            return
+        if not is_cacheable_question(question):
+            with self._lock:
+                self._counters['skipped'] += 1
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = {
+                'question': question,
+                'answer': answer,
+                'queries': final_answer_queries(rounds),
+                'stored_at': time.monotonic(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._counters['stores'] += 1
+
+    def invalidate_answers(self):
+        """数据被修改后丢弃所有缓存的答案，SQL仍可复用（重新执行即得到最新数据）"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry['answer'] = None
+
+    def metrics(self):
+        with self._lock:
+            return {'entries': len(self._entries), **self._counters}
+
+answer_cache = AnswerCache(ANSWER_CACHE_TTL, SQL_CACHE_TTL, ANSWER_CACHE_SIZE)
+
+async def rerun_cached_sql(entry):
+    """重新执行缓存的SQL，返回拼接后的结果文本，任一语句失败时返回None"""
+    from AiCraftTest.mcptools.mysql_tools import TOOL_ERROR_PREFIXES
+
+    if tool_registry.get('query') is None:
+        return None
+    sections = [f"以下为问题「{entry['question']}」所生成SQL的最新执行结果（未经模型总结）:"]
+    for query in entry['queries']:
+        arguments = {key: value for key, value in query.items() if value is not None}
+        result = await tool_registry.execute('query', arguments)
+        if result.lstrip().startswith(TOOL_ERROR_PREFIXES):
+            return None
+        sections.append(f"```sql\n{query['sql']}\n```\n\n{result}")
+    return "\n\n".join(sections)
+
+def lookup_cached_answer(user_query):
+    """查询答案缓存，命中时返回{'kind', 'response'}，不经过模型"""
+    kind, entry = answer_cache.lookup(user_query)
+    if kind == 'answer':
+        return {'kind': kind, 'response': entry['answer']}
+    if kind == 'sql':
+        response = run_async(rerun_cached_sql(entry))
+        if response is not None:
+            return {'kind': kind, 'response': response}
+    return None
+
+admission = AdmissionController(
+    AGENT_MAX_CONCURRENT, AGENT_MAX_QUEUE, AGENT_SESSION_QUOTA, AGENT_IP_QUOTA, AGENT_QUEUE_TIMEOUT
+)
+
+def get_admission_keys(session_id):
+    """返回准入配额使用的（会话键, 客户端IP）；未提供会话ID的请求按IP计算会话配额"""
+    client_ip = request.remote_addr or 'unknown'
+    session_key = session_id if session_id != 'default' else f'ip:{client_ip}'
+    return session_key, client_ip
+
+def admission_rejected_response(error):
+    response = jsonify({
+        'success': False,
+        'message': f'❌ {error}',
+        'retry_after': error.retry_after,
+        'timestamp': datetime.now().isoformat()
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
 # 配置模型客户端
 def create_model_client():
     """创建模型客户端"""
+    from autogen_core.models import ModelFamily
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+
     # 设置OpenAI API配置
     os.environ.setdefault("OPENAI_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
     
@@ -67,7 +517,7 @@ def create_model_client():
                 "function_calling": True,
                 "json_output": True,
                 "vision": False,
-                "stream": False,
+                "stream": True,
                 "structured_output": True,
                 "family": ModelFamily.UNKNOWN,
             },
@@ -78,32 +528,7 @@ def create_model_client():
         logger.error(f"创建模型客户端失败: {e}")
         return None
 
-def initialize_database_agent():
-    """初始化数据库Agent（同步版本）"""
-    global database_agent, mysql_tools
-    
-    try:
-        # 创建模型客户端
-        model_client = create_model_client()
-        if not model_client:
-            logger.error("模型客户端创建失败")
-            return False
-        
-        # 加载MySQL工具 - 使用本地MySQL工具方式获取正确的AutoGen工具
-        mysql_tools = create_mysql_tools()
-        
-        if not mysql_tools:
-            logger.error("MySQL工具加载失败")
-            return False
-        
-        logger.info(f"成功加载 {len(mysql_tools)} 个MySQL工具")
-        
-        # 创建数据库分析师Agent
-        database_agent = AssistantAgent(
-            name="DatabaseAnalyst",
-            tools=mysql_tools,
-            model_client=model_client,
-            system_message="""你是一个专业的MySQL数据库分析师，帮助用户查询和分析数据。
+DATABASE_AGENT_SYSTEM_MESSAGE = """你是一个专业的MySQL数据库分析师，帮助用户查询和分析数据。
 
 ## 可用工具
 - query: 执行SELECT查询  
@@ -122,11 +547,157 @@ def initialize_database_agent():
 3. 构建SQL查询并执行
 4. 输出原始的查询结果，同时输出针对数据的总结报告
 
-数据库连接已预先建立，直接开始查询分析即可。""",
-            model_client_stream=False
+数据库连接已预先建立，直接开始查询分析即可。"""
+
+class AgentPool:
+    """按会话隔离的Agent池
+
+    每个会话懒加载一个独立的AssistantAgent，对话上下文互不干扰；所有Agent共享
+    同一个模型客户端和同一个数据库连接池。超过max_size时淘汰最久未使用且未在运行的会话。
+    """
+
+    def __init__(self, model_client, max_size=AGENT_POOL_SIZE):
+        self.model_client = model_client
+        self.max_size = max_size
+        self._agents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create_agent(self, session_id):
+        from autogen_agentchat.agents import AssistantAgent
+        from AiCraftTest.mcptools.mysql_tools import create_mysql_tools
+
+        # 会话级工具携带session_id，写后读可粘滞到主库
+        tools = create_mysql_tools(session_id=session_id)
+        if not tools:
+            raise RuntimeError("MySQL工具加载失败")
+        agent = AssistantAgent(
+            name="DatabaseAnalyst",
+            tools=tools,
+            model_client=self.model_client,
+            system_message=DATABASE_AGENT_SYSTEM_MESSAGE,
+            # 流式输出模型token，/api/natural-query/stream可逐字推送；run()不受影响
+            model_client_stream=True
         )
+        logger.info(f"为会话 {session_id} 创建数据库Agent（当前 {len(self._agents) + 1}/{self.max_size}）")
+        return agent
+
+    def _evict(self):
+        """超出容量时从最久未使用的会话开始淘汰，跳过正在运行的Agent"""
+        for session_id in list(self._agents):
+            if len(self._agents) <= self.max_size:
+                break
+            if self._agents[session_id]['in_use'] == 0:
+                del self._agents[session_id]
+                logger.info(f"Agent池已满，淘汰会话: {session_id}")
+
+    def acquire(self, session_id):
+        """取出会话的Agent条目并标记为使用中，用完后需调用release"""
+        with self._lock:
+            entry = self._agents.get(session_id)
+            if entry is not None:
+                self._agents.move_to_end(session_id)
+                entry['in_use'] += 1
+                return entry
+
+        # 创建Agent时会初始化数据库工具，不持有全局锁，避免阻塞其他会话
+        agent = self._create_agent(session_id)
+        with self._lock:
+            entry = self._agents.get(session_id)
+            if entry is None:
+                entry = self._agents[session_id] = {'agent': agent, 'lock': asyncio.Lock(), 'in_use': 0}
+            else:
+                # 同一会话被并发创建，保留先放入池中的Agent
+                self._agents.move_to_end(session_id)
+            entry['in_use'] += 1
+            self._evict()
+            return entry
+
+    def release(self, entry):
+        with self._lock:
+            entry['in_use'] -= 1
+            self._evict()
+
+    @asynccontextmanager
+    async def checkout(self, session_id):
+        """在运行锁内使用会话的Agent，同一会话的查询按顺序执行"""
+        entry = await asyncio.to_thread(self.acquire, session_id)
+        try:
+            async with entry['lock']:
+                yield entry['agent']
+        finally:
+            self.release(entry)
+
+    def discard(self, session_id):
+        with self._lock:
+            self._agents.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._agents)
+
+def get_session_id(data=None):
+    """从请求体或请求头中获取会话ID，未提供时所有请求共用默认会话"""
+    session_id = (data or {}).get('session_id') or request.headers.get('X-Session-ID')
+    return str(session_id) if session_id else 'default'
+
+# 启动预热状态，/api/status据此报告就绪情况
+startup_state = {
+    'state': 'idle',
+    'steps': {},
+    'started_at': None,
+    'ready_at': None
+}
+schema_cache = {}
+_init_lock = threading.RLock()
+
+def load_database_tools():
+    """创建MySQL工具（同时初始化数据库连接池）并重建工具索引"""
+    global mysql_tools
+    from AiCraftTest.mcptools.mysql_tools import create_mysql_tools
+
+    with _init_lock:
+        tools = create_mysql_tools()
+        if not tools:
+            logger.error("MySQL工具加载失败")
+            return False
+        mysql_tools = tools
+        tool_registry.load(mysql_tools)
+        logger.info(f"成功加载 {len(mysql_tools)} 个MySQL工具")
+        return True
+
+def warm_schema_cache():
+    """读取所有表结构，预热数据库连接并缓存表结构"""
+    from AiCraftTest.mcptools.mysql_tools import get_database_backend
+
+    backend = get_database_backend()
+    with backend.connection() as connection, connection.cursor() as cursor:
+        tables = backend.list_tables(cursor)
+        schema_cache.update({table: backend.describe_table(cursor, table) for table in tables})
+    logger.info(f"已缓存 {len(schema_cache)} 张表的结构")
+    return True
+
+def initialize_database_agent():
+    """初始化数据库Agent池（同步版本），已初始化时直接返回"""
+    global agent_pool
+    
+    try:
+        with _init_lock:
+            if agent_pool is not None:
+                return True
+            
+            # 创建模型客户端，由池中所有Agent共享
+            model_client = create_model_client()
+            if not model_client:
+                logger.error("模型客户端创建失败")
+                return False
+            
+            # 加载MySQL工具 - 使用本地MySQL工具方式获取正确的AutoGen工具
+            if not mysql_tools and not load_database_tools():
+                return False
+            
+            # 创建数据库分析师Agent池，各会话的Agent在首次查询时创建
+            agent_pool = AgentPool(model_client, AGENT_POOL_SIZE)
         
-        logger.info("数据库Agent初始化成功")
+        logger.info(f"数据库Agent池初始化成功，容量: {AGENT_POOL_SIZE}")
         return True
         
     except Exception as e:
@@ -135,6 +706,45 @@ def initialize_database_agent():
         traceback.print_exc()
         return False
 
+def _run_warm_step(name, func):
+    started = time.perf_counter()
+    try:
+        ok = func() is not False
+    except Exception as e:
+        logger.error(f"预热步骤 {name} 失败: {e}")
+        ok = False
+    startup_state['steps'][name] = {
+        'status': 'ok' if ok else 'failed',
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    return ok
+
+def warm_start():
+    """后台预热：事件循环、数据库连接池与表结构缓存、模型客户端与Agent池"""
+    logger.info("开始后台预热...")
+    background_loop.start()
+    database_ok = _run_warm_step('database', load_database_tools)
+    if database_ok:
+        _run_warm_step('schema', warm_schema_cache)
+    agent_ok = _run_warm_step('agent', initialize_database_agent)
+    
+    if agent_ok:
+        startup_state['state'] = 'ready'
+    else:
+        # 数据库可用但模型不可用时，工具调试仍可使用
+        startup_state['state'] = 'degraded' if database_ok else 'failed'
+    startup_state['ready_at'] = datetime.now().isoformat()
+    logger.info(f"后台预热结束: {startup_state['state']}")
+
+def start_warmup():
+    """在后台线程中启动预热，重复调用只会执行一次"""
+    with _init_lock:
+        if startup_state['state'] != 'idle':
+            return
+        startup_state['state'] = 'warming'
+        startup_state['started_at'] = datetime.now().isoformat()
+    threading.Thread(target=warm_start, name="warm-start", daemon=True).start()
+
 @app.route('/')
 def index():
     """主页面"""
@@ -176,10 +786,10 @@ def initialize_agent():
 @app.route('/api/natural-query', methods=['POST'])
 def natural_query():
     """处理自然语言数据库查询"""
-    global database_agent
+    global agent_pool
     
     try:
-        if not database_agent:
+        if agent_pool is None:
             return jsonify({
                 'success': False,
                 'message': '❌ 请先初始化数据库Agent',
@@ -196,19 +806,44 @@ def natural_query():
                 'timestamp': datetime.now().isoformat()
             }), 400
         
-        logger.info(f"处理自然语言查询: {user_query}")
+        session_id = get_session_id(data)
+        logger.info(f"处理自然语言查询 [{session_id}]: {user_query}")
         
-        # 使用Agent处理查询
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # 重复的问题（不论来自哪个会话）命中缓存时直接返回，不占用Agent名额也不调用模型
+        cached = lookup_cached_answer(user_query)
+        if cached is not None:
+            logger.info(f"答案缓存命中 ({cached['kind']}): {user_query}")
+            return jsonify({
+                'success': True,
+                'query': user_query,
+                'session_id': session_id,
+                'response': cached['response'],
+                'cache': cached['kind'],
+                'timestamp': datetime.now().isoformat()
+            })
         
-        # 创建一个简单的运行环境来执行Agent
-        response = loop.run_until_complete(run_agent_query(user_query))
-        loop.close()
+        # 通过准入控制后在后台事件循环中运行Agent，排队时间计入总超时
+        session_key, client_ip = get_admission_keys(session_id)
+        try:
+            with admission.admit(session_key, client_ip) as waited:
+                response = run_async(
+                    run_agent_query(user_query, session_id),
+                    timeout=max(1.0, AGENT_REQUEST_TIMEOUT - waited)
+                )
+        except AdmissionRejected as e:
+            logger.warning(f"查询未被准入 [{session_key}@{client_ip}]: {e}")
+            return admission_rejected_response(e)
+        except concurrent.futures.TimeoutError:
+            return jsonify({
+                'success': False,
+                'message': f'❌ 查询超时（超过 {AGENT_REQUEST_TIMEOUT:.0f} 秒）',
+                'timestamp': datetime.now().isoformat()
+            }), 504
         
         return jsonify({
             'success': True,
             'query': user_query,
+            'session_id': session_id,
             'response': response,
             'timestamp': datetime.now().isoformat()
         })
@@ -222,16 +857,16 @@ def natural_query():
             'timestamp': datetime.now().isoformat()
         }), 500
 
-async def run_agent_query(user_query):
+async def run_agent_query(user_query, session_id='default'):
     """运行真实的Agent查询"""
-    global database_agent
+    global agent_pool
     
     try:
         logger.info(f"开始执行Agent查询: {user_query}")
         
-        # 使用agent.run()方法执行任务
-        result = await database_agent.run(task=user_query)
-        print(result.messages[-1].content)
+        # 不同会话的Agent在后台循环上并发运行，同一会话串行以保持上下文一致
+        async with agent_pool.checkout(session_id) as database_agent:
+            result = await database_agent.run(task=user_query)
         
         # 提取响应内容
         if result and hasattr(result, 'messages') and result.messages:
@@ -246,6 +881,9 @@ async def run_agent_query(user_query):
         else:
             response = "Agent执行完成，但未返回具体结果"
         
+        if result and getattr(result, 'messages', None):
+            answer_cache.store(user_query, response, result.messages)
+        
         logger.info("Agent查询执行完成")
         return response
             
@@ -254,17 +892,168 @@ async def run_agent_query(user_query):
         import traceback
         traceback.print_exc()
         return f"查询处理失败: {str(e)}\n\n请确保已正确配置数据库连接信息并初始化Agent。"
+
+_STREAM_END = object()
+
+def serialize_stream_event(message):
+    """将run_stream产生的消息转换为推送给前端的事件"""
+    from autogen_agentchat.base import TaskResult
+    from autogen_agentchat.messages import ModelClientStreamingChunkEvent, ToolCallExecutionEvent, ToolCallRequestEvent
+
+    if isinstance(message, TaskResult):
+        last_message = message.messages[-1] if message.messages else None
+        return {
+            'type': 'done',
+            'response': last_message.to_text() if last_message else '',
+            'stop_reason': message.stop_reason
+        }
+    if isinstance(message, ModelClientStreamingChunkEvent):
+        return {'type': 'token', 'content': message.content}
+    if isinstance(message, ToolCallRequestEvent):
+        return {
+            'type': 'tool_call',
+            'calls': [{'name': call.name, 'arguments': call.arguments} for call in message.content]
+        }
+    if isinstance(message, ToolCallExecutionEvent):
+        return {
+            'type': 'tool_result',
+            'results': [
+                {'name': result.name, 'content': result.content, 'is_error': bool(result.is_error)}
+                for result in message.content
+            ]
+        }
+    return {'type': 'message', 'source': message.source, 'content': message.to_text()}
+
+async def stream_agent_query(user_query, session_id, events, cancellation_token):
+    """在后台循环中运行Agent流，把事件逐个放入有界队列"""
+    try:
+        async with agent_pool.checkout(session_id) as database_agent:
+            async for message in database_agent.run_stream(task=user_query, cancellation_token=cancellation_token):
+                event = serialize_stream_event(message)
+                if event['type'] == 'done':
+                    answer_cache.store(user_query, event['response'], message.messages)
+                # 队列已满时在此等待，暂停消费模型流
+                await events.put(event)
+    except asyncio.CancelledError:
+        logger.info(f"流式查询已取消 [{session_id}]")
+        raise
+    except Exception as e:
+        logger.error(f"流式Agent查询异常: {e}")
+        await events.put({'type': 'error', 'message': f'查询处理失败: {str(e)}'})
+    await events.put(_STREAM_END)
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+@app.route('/api/natural-query/stream', methods=['POST'])
+def natural_query_stream():
+    """以SSE流式推送自然语言查询的工具调用、SQL结果和模型输出"""
+    if agent_pool is None:
+        return jsonify({
+            'success': False,
+            'message': '❌ 请先初始化数据库Agent',
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    data = request.get_json() or {}
+    user_query = data.get('query')
+    if not user_query:
+        return jsonify({
+            'success': False,
+            'message': '❌ 缺少查询内容',
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    from autogen_core import CancellationToken
+
+    session_id = get_session_id(data)
+    cached = lookup_cached_answer(user_query)
+    if cached is not None:
+        logger.info(f"答案缓存命中 ({cached['kind']}): {user_query}")
+        
+        def generate_cached():
+            yield format_sse({'type': 'start', 'query': user_query, 'session_id': session_id})
+            yield format_sse({'type': 'done', 'response': cached['response'], 'cache': cached['kind'], 'stop_reason': None})
+        
+        return Response(generate_cached(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    session_key, client_ip = get_admission_keys(session_id)
+    try:
+        waited = admission.acquire(session_key, client_ip)
+    except AdmissionRejected as e:
+        logger.warning(f"流式查询未被准入 [{session_key}@{client_ip}]: {e}")
+        return admission_rejected_response(e)
+    started = time.monotonic()
+    deadline = started + max(1.0, AGENT_REQUEST_TIMEOUT - waited)
+    logger.info(f"处理流式自然语言查询 [{session_id}]: {user_query}")
+    
+    async def create_queue():
+        return asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    
+    try:
+        events = run_async(create_queue())
+        cancellation_token = CancellationToken()
+        task = background_loop.submit(stream_agent_query(user_query, session_id, events, cancellation_token))
+    except Exception:
+        admission.release(session_key, client_ip, time.monotonic() - started)
+        raise
+    
+    async def next_event():
+        try:
+            return await asyncio.wait_for(events.get(), STREAM_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            return None
+    
+    def generate():
+        try:
+            yield format_sse({'type': 'start', 'query': user_query, 'session_id': session_id})
+            while True:
+                if time.monotonic() > deadline:
+                    yield format_sse({'type': 'error', 'message': f'查询超时（超过 {AGENT_REQUEST_TIMEOUT:.0f} 秒）'})
+                    break
+                event = run_async(next_event())
+                if event is _STREAM_END:
+                    break
+                if event is None:
+                    # 心跳注释行，客户端已断开时写入会失败并触发清理
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            # 客户端断开、超时或生成器被关闭时取消仍在运行的Agent
+            if not task.done():
+                cancellation_token.cancel()
+                task.cancel()
+                logger.info(f"流式查询提前结束，取消Agent [{session_id}]")
+    
+    released = threading.Event()
+    
+    def release_slot():
+        # 生成器可能从未开始迭代，名额统一在响应关闭时归还
+        if not released.is_set():
+            released.set()
+            if not task.done():
+                cancellation_token.cancel()
+                task.cancel()
+            admission.release(session_key, client_ip, time.monotonic() - started)
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(release_slot)
+    return response
+
 @app.route('/api/test-connection', methods=['POST'])
 def test_connection():
     """测试MySQL MCP连接"""
+    from AiCraftTest.mcptools.mysql_tools import test_mysql_tools
+
     try:
         logger.info("开始测试MySQL MCP连接...")
         
-        # 使用asyncio运行异步测试
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        success = loop.run_until_complete(test_mysql_tools())
-        loop.close()
+        # 在后台事件循环中运行异步测试
+        success = run_async(test_mysql_tools())
         
         if success:
             return jsonify({
@@ -291,30 +1080,15 @@ def test_connection():
 @app.route('/api/load-tools', methods=['POST'])
 def load_tools():
     """加载MySQL工具"""
-    global mysql_tools
-    
     try:
         logger.info("开始加载MySQL工具...")
         
-        # 使用asyncio运行异步操作
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # 使用简化工具方式加载工具
-        async def load_mysql_tools_async():
-            return create_mysql_tools()
-        
-        mysql_tools = loop.run_until_complete(load_mysql_tools_async())
-        loop.close()
-        
-        if mysql_tools:
-            tools_info = []
-            for tool in mysql_tools:
-                tool_info = {
-                    'name': tool.__name__ if hasattr(tool, '__name__') else str(tool),
-                    'description': getattr(tool, '__doc__', '无描述') or '无描述'
-                }
-                tools_info.append(tool_info)
+        # 重新创建工具并重建工具索引，描述和输入模式在此一次性计算
+        if load_database_tools():
+            tools_info = [
+                {'name': info['name'], 'description': info['description']}
+                for info in tool_registry.list_info()
+            ]
             
             return jsonify({
                 'success': True,
@@ -341,10 +1115,8 @@ def load_tools():
 @app.route('/api/execute-tool', methods=['POST'])
 def execute_tool():
     """执行MySQL工具"""
-    global mysql_tools
-    
     try:
-        if not mysql_tools:
+        if not tool_registry.count:
             return jsonify({
                 'success': False,
                 'message': '❌ 请先加载MySQL工具',
@@ -362,14 +1134,7 @@ def execute_tool():
                 'timestamp': datetime.now().isoformat()
             }), 400
         
-        # 查找对应的工具
-        target_tool = None
-        for tool in mysql_tools:
-            if tool.name == tool_name:
-                target_tool = tool
-                break
-        
-        if not target_tool:
+        if tool_registry.get(tool_name) is None:
             return jsonify({
                 'success': False,
                 'message': f'❌ 未找到工具: {tool_name}',
@@ -378,14 +1143,34 @@ def execute_tool():
         
         logger.info(f"执行工具: {tool_name}, 参数: {tool_args}")
         
-        # 注意：这里简化处理，实际的工具执行需要更复杂的MCP会话管理
-        # 由于工具执行需要活跃的MCP会话，这里返回模拟结果
+        # 该接口无鉴权，默认只返回模拟结果
+        if not EXECUTE_TOOLS_ENABLED:
+            return jsonify({
+                'success': True,
+                'message': f'✅ 工具 {tool_name} 执行请求已发送',
+                'tool_name': tool_name,
+                'args': tool_args,
+                'note': '注意：这里显示的是模拟结果；设置 WEB_DEMO_EXECUTE_TOOLS=true 后可直接执行只读工具',
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        if tool_name not in READ_ONLY_TOOLS:
+            return jsonify({
+                'success': False,
+                'message': f'❌ 工具 {tool_name} 会修改数据，不允许通过此接口直接执行',
+                'timestamp': datetime.now().isoformat()
+            }), 403
+        
+        # 工具直接访问数据库后端，在后台事件循环中执行
+        result = run_async(tool_registry.execute(tool_name, tool_args))
+        
         return jsonify({
             'success': True,
-            'message': f'✅ 工具 {tool_name} 执行请求已发送',
+            'message': f'✅ 工具 {tool_name} 执行完成',
             'tool_name': tool_name,
             'args': tool_args,
-            'note': '注意：实际工具执行需要活跃的MCP会话，这里显示的是模拟结果',
+            'result': result,
+            'metrics': tool_registry.metrics().get(tool_name),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -401,42 +1186,30 @@ def execute_tool():
 @app.route('/api/get-tool-info/<tool_name>', methods=['GET'])
 def get_tool_info(tool_name):
     """获取特定工具的详细信息"""
-    global mysql_tools
-    
     try:
-        if not mysql_tools:
+        if not tool_registry.count:
             return jsonify({
                 'success': False,
                 'message': '❌ 请先加载MySQL工具',
                 'timestamp': datetime.now().isoformat()
             }), 400
         
-        # 查找工具
-        for tool in mysql_tools:
-            if tool.name == tool_name:
-                tool_info = {
-                    'name': tool.name,
-                    'description': getattr(tool, 'description', '无描述'),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # 添加输入模式信息
-                if hasattr(tool, 'inputSchema'):
-                    try:
-                        tool_info['inputSchema'] = tool.inputSchema
-                    except:
-                        tool_info['inputSchema'] = str(tool.inputSchema)
-                
-                return jsonify({
-                    'success': True,
-                    'tool': tool_info
-                })
+        info = tool_registry.info(tool_name)
+        if info is None:
+            return jsonify({
+                'success': False,
+                'message': f'❌ 未找到工具: {tool_name}',
+                'timestamp': datetime.now().isoformat()
+            }), 404
         
         return jsonify({
-            'success': False,
-            'message': f'❌ 未找到工具: {tool_name}',
-            'timestamp': datetime.now().isoformat()
-        }), 404
+            'success': True,
+            'tool': {
+                **info,
+                'metrics': tool_registry.metrics().get(tool_name),
+                'timestamp': datetime.now().isoformat()
+            }
+        })
         
     except Exception as e:
         logger.error(f"获取工具信息异常: {e}")
@@ -457,6 +1230,14 @@ def get_status():
         'status': {
             'tools_loaded': mysql_tools is not None,
             'tools_count': len(mysql_tools) if mysql_tools else 0,
+            'agent_ready': agent_pool is not None,
+            'active_sessions': len(agent_pool) if agent_pool is not None else 0,
+            'tool_metrics': tool_registry.metrics(),
+            'admission': admission.metrics(),
+            'answer_cache': answer_cache.metrics(),
+            'ready': startup_state['state'] == 'ready',
+            'startup': startup_state,
+            'cached_tables': sorted(schema_cache),
             'timestamp': datetime.now().isoformat()
         }
     })
@@ -465,10 +1246,15 @@ if __name__ == '__main__':
     print("🚀 启动MySQL MCP交互式演示...")
     print("📱 访问地址: http://localhost:5001")
     print("🔧 API端点:")
+    print("   - POST /api/natural-query/stream - 流式自然语言查询 (SSE)")
     print("   - POST /api/test-connection - 测试连接")
     print("   - POST /api/load-tools - 加载工具")
     print("   - POST /api/execute-tool - 执行工具")
     print("   - GET  /api/get-tool-info/<tool_name> - 获取工具信息")
     print("   - GET  /api/status - 获取状态")
     
+    # debug模式下重载器的父进程不提供服务，只在实际服务进程中预热
+    if WARM_START and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
+    
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -4,20 +4,27 @@ MySQL MCP Web演示启动脚本
 """
 
 import os
+import socket
 import sys
-import webbrowser
+import threading
 import time
-from threading import Timer
+import webbrowser
 
 # 添加项目根目录到路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.join(current_dir, '../../..')
 sys.path.append(project_root)
 
-def open_browser():
-    """延迟打开浏览器"""
-    time.sleep(1.5)  # 等待Flask服务启动
-    webbrowser.open('http://localhost:5001')
+def open_browser_when_ready(port=5001, timeout=10.0):
+    """在后台线程中等待端口可连接后再打开浏览器，不阻塞服务启动"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                break
+        except OSError:
+            time.sleep(0.1)
+    webbrowser.open(f'http://localhost:{port}')
 
 def main():
     """主函数"""
@@ -38,13 +45,17 @@ def main():
     os.chdir(current_dir)
     print(f"📁 工作目录: {current_dir}")
     
-    # 启动浏览器
-    print("🌐 准备打开浏览器...")
-    Timer(1.0, open_browser).start()
+    # 服务开始监听后再打开浏览器
+    if '--no-browser' not in sys.argv:
+        print("🌐 服务就绪后将自动打开浏览器...")
+        threading.Thread(target=open_browser_when_ready, daemon=True).start()
     
-    # 导入并启动Flask应用
+    # 导入并启动Flask应用，模型客户端和数据库连接在后台预热
     try:
-        from app import app
+        from app import WARM_START, app, start_warmup
+        if WARM_START:
+            start_warmup()
+            print("🔥 后台预热已启动，可通过 /api/status 查看就绪状态")
         print("🔧 启动Flask服务器...")
         print("📱 访问地址: http://localhost:5001")
         print("⏹️  按 Ctrl+C 停止服务器")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+测试答案缓存的匹配范围和SQL记录
+"""
+
+import json
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from autogen_agentchat.messages import TextMessage, ToolCallExecutionEvent, ToolCallRequestEvent
+from autogen_core import FunctionCall
+from autogen_core.models import FunctionExecutionResult
+
+from app import AnswerCache, is_cacheable_question
+
+
+def agent_run(*rounds):
+    """构造一次Agent运行的消息，每轮为[(name, arguments, result), ...]"""
+    messages = [TextMessage(source="user", content="question")]
+    call_id = 0
+    for calls in rounds:
+        requests, results = [], []
+        for name, arguments, content in calls:
+            call_id += 1
+            requests.append(FunctionCall(id=str(call_id), name=name, arguments=json.dumps(arguments)))
+            results.append(FunctionExecutionResult(content=content, name=name, call_id=str(call_id), is_error=False))
+        messages.append(ToolCallRequestEvent(source="agent", content=requests))
+        messages.append(ToolCallExecutionEvent(source="agent", content=results))
+    messages.append(TextMessage(source="agent", content="answer"))
+    return messages
+
+
+def new_cache():
+    return AnswerCache(answer_ttl=300, sql_ttl=3600, max_size=16)
+
+
+def test_exact_normalized_match():
+    cache = new_cache()
+    cache.store("How many active users are there?", "42", agent_run())
+    kind, entry = cache.lookup("how many ACTIVE users are there")
+    assert kind == "answer" and entry["answer"] == "42"
+
+
+def test_opposite_questions_do_not_match():
+    cache = new_cache()
+    cache.store("how many active users are there", "42", agent_run())
+    cache.store("which product has the highest total sales", "A", agent_run())
+    assert cache.lookup("how many inactive users are there") == (None, None)
+    assert cache.lookup("which product has the lowest total sales") == (None, None)
+
+
+def test_answers_are_shared_across_sessions(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "answer_cache", new_cache())
+    monkeypatch.setattr(app, "agent_pool", object())
+    app.answer_cache.store("how many active users are there", "42", agent_run())
+    # 另一个标签页（新的sessionId）提出同一个问题
+    response = app.app.test_client().post(
+        "/api/natural-query",
+        json={"query": "How many active users are there?"},
+        headers={"X-Session-ID": "another-tab"},
+    )
+    body = response.get_json()
+    assert body["success"] and body["response"] == "42" and body["cache"] == "answer"
+
+
+def test_follow_up_and_short_questions_are_not_cached():
+    assert not is_cacheable_question("那上个月呢")
+    assert not is_cacheable_question("what about last month?")
+    assert not is_cacheable_question("多少")
+    assert is_cacheable_question("统计每个城市的活跃用户数量")
+
+    cache = new_cache()
+    cache.store("那上个月呢", "x", agent_run())
+    assert cache.lookup("那上个月呢") == (None, None)
+
+
+def test_only_final_successful_queries_are_stored():
+    messages = agent_run(
+        [("query", {"sql": "SELECT * FROM user"}, "查询执行失败: no such table: user")],
+        [("list_tables", {}, "## 数据库表列表")],
+        [
+            ("query", {"sql": "SELECT COUNT(*) FROM users"}, "## 查询结果 (共1行)"),
+            ("query", {"sql": "SELECT bad"}, "查询执行失败: syntax error"),
+        ],
+    )
+    cache = new_cache()
+    cache.store("how many users are there", "answer", messages)
+    cache.invalidate_answers()
+    kind, entry = cache.lookup("how many users are there")
+    assert kind == "sql"
+    assert entry["queries"] == [{"sql": "SELECT COUNT(*) FROM users", "params": None}]
+
+
+def test_write_runs_invalidate_answers():
+    cache = new_cache()
+    cache.store("how many active users are there", "42", agent_run())
+    cache.store("deactivate user alice please", "done", agent_run([("execute", {"sql": "UPDATE users SET status='inactive'"}, "## SQL执行成功")]))
+    assert cache.lookup("how many active users are there") == (None, None)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+HTML正文提取基准测试 - 对比 readability 与 fast 两种引擎
+
+对保存的HTML页面语料逐页运行各引擎，统计耗时，并以readability输出为参照，
+用词级F1衡量fast引擎的输出质量。每个页面在独立子进程中执行并带超时，
+避免个别页面卡住整个测试。
+
+用法:
+    python benchmark_extract.py pages/ --repeat 3
+    python benchmark_extract.py pages/ --engines fast --output result.json
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import multiprocessing
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+ENGINES = ("readability", "fast")
+
+
+def _timed_extract(html: str, engine: str):
+    """在子进程中执行提取并计时"""
+    from mcp_server_fetch import extract_content
+
+    started = time.perf_counter()
+    content = extract_content(html, engine)
+    return content, time.perf_counter() - started
+
+
+def _words(text: str) -> Counter:
+    # 英文按单词、中文按单字统计
+    return Counter(re.findall(r"[A-Za-z0-9]+|[一-鿿]", text.lower()))
+
+
+def overlap_f1(reference: str, candidate: str) -> float:
+    """候选输出相对参照输出的词级F1"""
+    ref_words, cand_words = _words(reference), _words(candidate)
+    common = sum((ref_words & cand_words).values())
+    if not common:
+        return 0.0
+    precision = common / sum(cand_words.values())
+    recall = common / sum(ref_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def load_corpus(corpus_dir: str) -> List[str]:
+    paths = sorted(
+        glob.glob(os.path.join(corpus_dir, "**", "*.html"), recursive=True)
+        + glob.glob(os.path.join(corpus_dir, "**", "*.htm"), recursive=True)
+    )
+    return paths
+
+
+def _new_executor():
+    return concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _kill_executor(executor) -> None:
+    # 超时的子进程无法中断，需在shutdown之前直接结束
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_page(executor, html: str, engine: str, repeat: int, timeout: float) -> Optional[Dict]:
+    """对单个页面运行指定引擎repeat次，超时返回None"""
+    timings = []
+    content = ""
+    for _ in range(repeat):
+        try:
+            content, elapsed = executor.submit(_timed_extract, html, engine).result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            return None
+        timings.append(elapsed)
+    return {"content": content, "ms": statistics.median(timings) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML正文提取引擎基准测试")
+    parser.add_argument("corpus", help="保存的HTML页面目录（*.html / *.htm）")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES), help="参与对比的引擎")
+    parser.add_argument("--repeat", type=int, default=3, help="每页重复次数，取中位数")
+    parser.add_argument("--timeout", type=float, default=60, help="单页单次超时（秒）")
+    parser.add_argument("--output", help="将逐页结果写入JSON文件")
+    args = parser.parse_args()
+
+    paths = load_corpus(args.corpus)
+    if not paths:
+        print(f"❌ 目录中没有HTML页面: {args.corpus}")
+        return
+    print(f"语料: {len(paths)} 个页面, 引擎: {', '.join(args.engines)}, 重复: {args.repeat}")
+
+    results = []
+    executor = _new_executor()
+    try:
+        for path in paths:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            row = {"page": os.path.relpath(path, args.corpus), "html_chars": len(html)}
+            for engine in args.engines:
+                outcome = run_page(executor, html, engine, args.repeat, args.timeout)
+                if outcome is None:
+                    _kill_executor(executor)
+                    executor = _new_executor()
+                    row[engine] = {"ms": None, "chars": None, "timeout": True}
+                    continue
+                row[engine] = {"ms": outcome["ms"], "chars": len(outcome["content"]), "content": outcome["content"]}
+            if all(row.get(engine, {}).get("content") is not None for engine in ENGINES):
+                row["f1"] = overlap_f1(row["readability"]["content"], row["fast"]["content"])
+            results.append(row)
+            print(_format_row(row, args.engines))
+    finally:
+        _kill_executor(executor)
+
+    _print_summary(results, args.engines)
+
+    if args.output:
+        for row in results:
+            for engine in args.engines:
+                row[engine].pop("content", None)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 结果已保存到: {args.output}")
+
+
+def _format_row(row: Dict, engines: List[str]) -> str:
+    cells = [f"{row['page'][:40]:<40}", f"{row['html_chars']:>10}"]
+    for engine in engines:
+        ms = row[engine]["ms"]
+        cells.append(f"{engine}: {'超时' if ms is None else f'{ms:.1f}ms':>10}")
+    if "f1" in row:
+        cells.append(f"F1: {row['f1']:.2f}")
+    return "  ".join(cells)
+
+
+def _print_summary(results: List[Dict], engines: List[str]) -> None:
+    print("\n=== 汇总 ===")
+    medians = {}
+    for engine in engines:
+        timings = [row[engine]["ms"] for row in results if row[engine]["ms"] is not None]
+        timeouts = sum(1 for row in results if row[engine].get("timeout"))
+        if timings:
+            medians[engine] = statistics.median(timings)
+            print(f"{engine:<12} 中位耗时 {medians[engine]:.1f}ms, 总耗时 {sum(timings):.0f}ms, 超时 {timeouts} 页")
+        else:
+            print(f"{engine:<12} 无有效结果, 超时 {timeouts} 页")
+    if "readability" in medians and "fast" in medians and medians["fast"]:
+        print(f"fast 相对 readability 加速: {medians['readability'] / medians['fast']:.1f}x")
+    scores = [row["f1"] for row in results if "f1" in row]
+    if scores:
+        print(f"fast 与 readability 输出的词级F1: 平均 {statistics.mean(scores):.2f}, 最低 {min(scores):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,19 @@
-from typing import Annotated, Tuple
-from urllib.parse import urlparse, urlunparse
+import asyncio
+import codecs
+import concurrent.futures
+import getpass
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import warnings
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Annotated, Awaitable, Callable, Literal, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse, urlunparse
 
 import markdownify
 import readabilipy.simple_json
@@ -24,6 +38,184 @@ DEFAULT_USER_AGENT_AUTONOMOUS = "ModelContextProtocol/1.0 (Autonomous; +https://
 # 定义默认的用户代理字符串，用于手动抓取模式
 DEFAULT_USER_AGENT_MANUAL = "ModelContextProtocol/1.0 (User-Specified; +https://github.com/modelcontextprotocol/servers)"
 
+# 共享HTTP客户端的连接池配置
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+# 同一主机的最大并发请求数
+HTTP_MAX_CONNECTIONS_PER_HOST = 6
+
+# robots.txt缓存：默认有效期、上限（RFC 9309建议不超过24小时）、4xx负缓存和5xx错误的有效期（秒）
+ROBOTS_CACHE_TTL = 3600
+ROBOTS_CACHE_MAX_TTL = 86400
+ROBOTS_NEGATIVE_TTL = 3600
+ROBOTS_ERROR_TTL = 60
+ROBOTS_CACHE_MAX_ENTRIES = 1024
+
+# 页面响应磁盘缓存：目录、容量上限（超出后按LRU淘汰）
+def _default_cache_dir() -> str:
+    """当前用户私有的缓存目录；共享临时目录下的缓存可被其他用户读取或预先植入伪造页面"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    if not os.path.isabs(base):
+        # 无法确定主目录时退回临时目录，按用户名区分
+        base = os.path.join(tempfile.gettempdir(), f"mcp-cache-{getpass.getuser()}")
+    return os.path.join(base, "mcp-fetch")
+
+
+FETCH_CACHE_DIR = os.environ.get("MCP_FETCH_CACHE_DIR") or _default_cache_dir()
+FETCH_CACHE_SIZE_LIMIT = int(os.environ.get("MCP_FETCH_CACHE_SIZE_MB", "256")) * 1024 * 1024
+# 响应没有缓存头时的新鲜期（秒），start_index分页续取在此期间不再访问网络
+FETCH_CACHE_FRESH_SECONDS = 300
+FETCH_CACHE_MAX_AGE = 86400
+# 单个页面下载的字节上限，超出部分丢弃
+FETCH_MAX_BYTES = int(os.environ.get("MCP_FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+# 判断内容类型时检查的首部字节数
+SNIFF_BYTES = 1024
+# 无法作为文本返回的内容类型前缀
+BINARY_CONTENT_TYPES = (
+    "image/", "audio/", "video/", "font/",
+    "application/octet-stream", "application/pdf", "application/zip",
+    "application/gzip", "application/x-", "application/vnd.",
+)
+
+# fetch_many：单次最多URL数、同时抓取数、默认和最大总时限（秒）
+FETCH_MANY_MAX_URLS = 20
+FETCH_MANY_CONCURRENCY = 8
+FETCH_MANY_DEFAULT_DEADLINE = 60
+FETCH_MANY_MAX_DEADLINE = 300
+
+# crawl：默认/最大页数、默认/最大深度、默认每域名请求间隔（秒）、worker数上限、总时限（秒）
+CRAWL_DEFAULT_MAX_PAGES = 50
+CRAWL_MAX_PAGES = 500
+CRAWL_DEFAULT_MAX_DEPTH = 3
+CRAWL_MAX_DEPTH = 10
+CRAWL_DEFAULT_DELAY = 1.0
+CRAWL_MAX_WORKERS = 16
+CRAWL_DEFAULT_DEADLINE = 300
+CRAWL_MAX_DEADLINE = 1800
+# 爬取结果在本地存储中的有效期（秒），期间fetch工具直接返回存储的markdown
+CRAWL_STORE_TTL = 86400
+# 爬取时跳过的非页面资源
+CRAWL_SKIP_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".pdf", ".zip", ".gz", ".tar", ".mp3", ".mp4", ".woff", ".woff2", ".ttf",
+)
+
+# HTML简化进程池：进程数、单页超时（秒）、参与解析的HTML最大字符数
+EXTRACT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+EXTRACT_TIMEOUT = 30
+EXTRACT_MAX_HTML_CHARS = 5 * 1024 * 1024
+# auto模式下超过该字符数的页面使用fast引擎提取
+FAST_EXTRACT_THRESHOLD = 200_000
+# 内存中缓存的转换后markdown条目数，更早的条目只保留在磁盘缓存中
+MARKDOWN_MEMORY_CACHE_ENTRIES = 64
+
+# 进程级共享的HTTP客户端，serve()启动时创建、退出时关闭
+_http_client = None
+# 主机 -> [信号量, 正在使用或等待的请求数]，没有请求时删除，避免长时间爬取后无限增长
+_host_semaphores: dict = {}
+
+
+def create_http_client():
+    """创建支持HTTP/2和keep-alive连接池的AsyncClient。
+
+    未安装h2时（pip install httpx[http2]）回退到HTTP/1.1。
+    """
+    from httpx import AsyncClient, Limits
+
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+
+    return AsyncClient(
+        http2=http2,
+        limits=Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=30,
+    )
+
+
+def get_http_client():
+    """获取共享的HTTP客户端，未通过serve()启动时按需创建"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """关闭共享的HTTP客户端，释放连接池"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _host_semaphores.clear()
+
+
+_response_cache = None
+_response_cache_disabled = False
+
+
+def _ensure_private_dir(path: str) -> None:
+    """创建仅当前用户可访问的目录，目录属于其他用户时抛出PermissionError"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid") and os.stat(path).st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    os.chmod(path, 0o700)
+
+
+def get_response_cache():
+    """获取页面响应的磁盘缓存；未安装diskcache或缓存目录无法设为私有时返回None"""
+    global _response_cache, _response_cache_disabled
+    if _response_cache is None:
+        if _response_cache_disabled:
+            return None
+        try:
+            from diskcache import Cache
+        except ImportError:
+            return None
+        try:
+            _ensure_private_dir(FETCH_CACHE_DIR)
+        except OSError as e:
+            _response_cache_disabled = True
+            warnings.warn(f"Response cache disabled, cannot use {FETCH_CACHE_DIR} as a private directory: {e}")
+            return None
+        _response_cache = Cache(
+            FETCH_CACHE_DIR,
+            size_limit=FETCH_CACHE_SIZE_LIMIT,
+            eviction_policy="least-recently-used",
+        )
+    return _response_cache
+
+
+def close_response_cache() -> None:
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
+
+
+@asynccontextmanager
+async def host_slot(url: str):
+    """限制对同一主机的并发请求数"""
+    host = urlparse(url).netloc
+    entry = _host_semaphores.get(host)
+    if entry is None:
+        entry = _host_semaphores[host] = [asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and _host_semaphores.get(host) is entry:
+            del _host_semaphores[host]
+
 
 def extract_content_from_html(html: str) -> str:
     """从HTML中提取内容并转换为Markdown格式。
@@ -46,6 +238,364 @@ def extract_content_from_html(html: str) -> str:
     return content
 
 
+# fast引擎直接丢弃的元素
+_FAST_DROP_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "form",
+    "nav", "header", "footer", "aside", "button", "input", "select", "textarea",
+)
+_FAST_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "body", "pre", "blockquote", "ul", "ol",
+    "table", "hr", "figure", "dl", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _fast_select_main(root):
+    """选出正文所在元素：优先article/main，否则按段落文本量给父元素打分（类似readability）"""
+    for xpath in ("//article", "//main", "//*[@role='main']"):
+        found = root.xpath(xpath)
+        if found:
+            return max(found, key=lambda element: len(element.text_content()))
+
+    scores = {}
+    for paragraph in root.iter("p", "pre", "td"):
+        text_length = len(paragraph.text_content().strip())
+        if text_length < 25:
+            continue
+        score = 1 + min(text_length / 100, 3)
+        parent = paragraph.getparent()
+        if parent is not None:
+            scores[parent] = scores.get(parent, 0) + score
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + score / 2
+
+    best, best_score = None, 0.0
+    for element, score in scores.items():
+        text_length = len(element.text_content()) or 1
+        link_length = sum(len(link.text_content()) for link in element.iter("a"))
+        score *= 1 - link_length / text_length
+        if score > best_score:
+            best, best_score = element, score
+    if best is not None:
+        return best
+    body = root.find("body")
+    return body if body is not None else root
+
+
+def _fast_inline_element(child) -> str:
+    """渲染单个行内元素（链接、强调、代码、图片、换行），不含其tail"""
+    tag = child.tag if isinstance(child.tag, str) else ""
+    if tag == "br":
+        return "\n"
+    if tag == "img":
+        return f"![{child.get('alt', '')}]({child.get('src')})" if child.get("src") else ""
+    if not tag:
+        return ""
+    text = _fast_inline(child).strip()
+    if not text:
+        return ""
+    if tag == "a" and child.get("href"):
+        return f"[{text}]({child.get('href')})"
+    if tag in ("strong", "b"):
+        return f"**{text}**"
+    if tag in ("em", "i"):
+        return f"*{text}*"
+    if tag == "code":
+        return f"`{text}`"
+    return f" {text} " if tag in _FAST_BLOCK_TAGS or tag == "li" else text
+
+
+def _fast_inline(element) -> str:
+    """渲染元素的行内内容，合并多余空白"""
+    parts = [element.text or ""]
+    for child in element:
+        parts.append(_fast_inline_element(child))
+        parts.append(child.tail or "")
+    return "\n".join(_WHITESPACE.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+
+
+def _fast_list(element, depth: int) -> str:
+    lines = []
+    ordered = element.tag == "ol"
+    for index, item in enumerate(element.findall("li"), 1):
+        nested = [child for child in item if child.tag in ("ul", "ol")]
+        for child in nested:
+            # 嵌套列表单独渲染，先从行内文本中移除
+            tail, child.tail = child.tail, None
+            item.remove(child)
+            child.tail = tail
+        marker = f"{index}." if ordered else "-"
+        lines.append(f"{'  ' * depth}{marker} {_fast_inline(item).strip()}")
+        lines.extend(_fast_list(child, depth + 1) for child in nested)
+    return "\n".join(line for line in lines if line.strip())
+
+
+def _fast_table(element) -> str:
+    rows = []
+    for row in element.iter("tr"):
+        cells = [_fast_inline(cell).replace("\n", " ").replace("|", "\\|").strip() for cell in row if cell.tag in ("td", "th")]
+        if cells:
+            rows.append(cells)
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    lines = ["| " + " | ".join(rows[0]) + " |", "| " + " | ".join(["---"] * width) + " |"]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+    return "\n".join(lines)
+
+
+def _fast_blocks(element, out: list) -> None:
+    """把块级元素渲染为markdown段落，追加到out"""
+    tag = element.tag
+    if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+        text = _fast_inline(element).replace("\n", " ").strip()
+        if text:
+            out.append(f"{'#' * int(tag[1])} {text}")
+    elif tag == "pre":
+        out.append(f"```\n{element.text_content().strip(chr(10))}\n```")
+    elif tag in ("ul", "ol"):
+        out.append(_fast_list(element, 0))
+    elif tag == "table":
+        out.append(_fast_table(element))
+    elif tag == "hr":
+        out.append("---")
+    elif tag == "blockquote":
+        inner = []
+        _fast_container(element, inner)
+        out.append("\n".join(f"> {line}" if line else ">" for line in "\n\n".join(inner).split("\n")))
+    else:
+        _fast_container(element, out)
+
+
+def _fast_container(element, out: list) -> None:
+    """容器元素：行内内容累积为段落，遇到块级子元素时分段"""
+    buffer = [element.text or ""]
+
+    def flush():
+        text = "\n".join(_WHITESPACE.sub(" ", line).strip() for line in "".join(buffer).split("\n")).strip()
+        if text:
+            out.append(text)
+        buffer.clear()
+
+    for child in element:
+        tag = child.tag if isinstance(child.tag, str) else ""
+        if tag in _FAST_BLOCK_TAGS:
+            flush()
+            _fast_blocks(child, out)
+        else:
+            buffer.append(_fast_inline_element(child))
+        buffer.append(child.tail or "")
+    flush()
+
+
+def extract_content_fast(html: str) -> str:
+    """使用lxml的轻量正文提取，输出约定与extract_content_from_html一致。
+    
+    Args:
+        html: 需要处理的原始HTML内容
+        
+    Returns:
+        简化后的markdown版本内容
+    """
+    import lxml.html
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (ValueError, lxml.etree.ParserError):
+        return "<error>Page failed to be simplified from HTML</error>"
+    for element in list(root.iter(*_FAST_DROP_TAGS)):
+        element.drop_tree()
+
+    blocks = []
+    _fast_blocks(_fast_select_main(root), blocks)
+    content = "\n\n".join(block for block in blocks if block.strip())
+    if not content:
+        return "<error>Page failed to be simplified from HTML</error>"
+    return content + "\n"
+
+
+def resolve_extract_engine(engine: str, html: str) -> str:
+    """auto模式下大页面使用fast引擎，其余使用readability"""
+    if engine == "auto":
+        return "fast" if len(html) > FAST_EXTRACT_THRESHOLD else "readability"
+    return engine
+
+
+def extract_content(html: str, engine: str = "readability") -> str:
+    """按引擎提取正文，供进程池调用"""
+    if engine == "fast":
+        return extract_content_fast(html)
+    return extract_content_from_html(html)
+
+
+_extract_pool = None
+_extract_semaphore = None
+# 每个进程池中尚未完成的解析任务，换下进程池时用来判断何时可以结束其子进程
+_extract_inflight: dict = {}
+# 正在换下旧进程池的后台任务，保持强引用直到完成
+_retire_tasks: set = set()
+
+
+def get_extract_pool():
+    """获取HTML简化进程池，使用spawn避免fork带着事件循环和线程状态"""
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=EXTRACT_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _extract_pool
+
+
+def _terminate_pool(pool) -> None:
+    # ProcessPoolExecutor没有公开的终止接口，卡住的解析任务只能通过私有的_processes结束子进程；
+    # 该属性不存在（其他实现或已关闭）时只做不等待的shutdown
+    processes = getattr(pool, "_processes", None) or {}
+    for process in list(processes.values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _detach_extract_pool(pool) -> set:
+    """让之后的任务改用新进程池，返回旧池中仍在执行的任务"""
+    global _extract_pool
+    if _extract_pool is pool:
+        _extract_pool = None
+    return {future for future in _extract_inflight.pop(pool, ()) if not future.done()}
+
+
+async def _retire_extract_pool(pool) -> None:
+    """换下有任务超时的进程池：等旧池中其他任务完成（各自仍受超时限制）后再结束子进程"""
+    pending = _detach_extract_pool(pool)
+    try:
+        if pending:
+            await asyncio.wait(pending, timeout=EXTRACT_TIMEOUT)
+    finally:
+        # 退出时任务被取消也要结束子进程
+        _terminate_pool(pool)
+
+
+def _forget_retire_task(task: asyncio.Task) -> None:
+    _retire_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        warnings.warn(f"Failed to shut down a timed-out extract pool: {task.exception()!r}")
+
+
+async def shutdown_extract_pools() -> None:
+    """退出时结束所有进程池：取消换池任务（其子进程随之结束），在线程中关闭当前进程池"""
+    for task in list(_retire_tasks):
+        task.cancel()
+    await asyncio.gather(*_retire_tasks, return_exceptions=True)
+    await asyncio.to_thread(close_extract_pool)
+
+
+def close_extract_pool(kill: bool = False) -> None:
+    """关闭进程池；kill为True时强制结束仍在解析的子进程"""
+    global _extract_pool
+    pool, _extract_pool = _extract_pool, None
+    _extract_inflight.pop(pool, None)
+    if pool is None:
+        return
+    if kill:
+        _terminate_pool(pool)
+    else:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def extract_content_async(html: str, engine: str = "readability") -> str:
+    """
+    在进程池中执行正文提取，不阻塞事件循环。
+    
+    超大页面只解析前EXTRACT_MAX_HTML_CHARS个字符；同时进行的解析任务数不超过进程数。
+    超时后立即换用新进程池，旧池在其他任务完成后再结束子进程；进程池崩溃时在新池中重试一次。
+    
+    Args:
+        html: 需要处理的原始HTML内容
+        engine: 提取引擎，readability或fast
+        
+    Returns:
+        简化后的markdown版本内容
+    """
+    global _extract_semaphore
+    if _extract_semaphore is None:
+        _extract_semaphore = asyncio.Semaphore(EXTRACT_MAX_WORKERS)
+    if len(html) > EXTRACT_MAX_HTML_CHARS:
+        html = html[:EXTRACT_MAX_HTML_CHARS]
+
+    async with _extract_semaphore:
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = get_extract_pool()
+            try:
+                future = loop.run_in_executor(pool, extract_content, html, engine)
+                inflight = _extract_inflight.setdefault(pool, set())
+                inflight.add(future)
+                future.add_done_callback(inflight.discard)
+                return await asyncio.wait_for(future, EXTRACT_TIMEOUT)
+            except asyncio.TimeoutError:
+                task = asyncio.ensure_future(_retire_extract_pool(pool))
+                _retire_tasks.add(task)
+                task.add_done_callback(_forget_retire_task)
+                return f"<error>Page simplification timed out after {EXTRACT_TIMEOUT} seconds</error>"
+            except concurrent.futures.process.BrokenProcessPool as e:
+                # 子进程异常退出后整个进程池不可用，换新池重试一次
+                _detach_extract_pool(pool)
+                pool.shutdown(wait=False, cancel_futures=True)
+                if attempt:
+                    raise McpError(INTERNAL_ERROR, f"Page simplification worker crashed: {e!r}")
+            except OSError:
+                # 进程池不可用时（如受限环境无法创建子进程）退回线程中执行
+                _detach_extract_pool(pool)
+                pool.shutdown(wait=False, cancel_futures=True)
+                return await asyncio.to_thread(extract_content, html, engine)
+
+
+# 转换后markdown的内存LRU缓存，键包含响应验证器，页面变化后自动失效
+_markdown_memory_cache: OrderedDict = OrderedDict()
+
+
+def _markdown_cache_key(page: dict, engine: str) -> str:
+    """以URL、提取引擎和响应验证器（ETag/Last-Modified，缺失时用内容哈希）作为缓存键"""
+    validator = page.get("etag") or page.get("last_modified")
+    if not validator:
+        validator = hashlib.sha256(page["text"].encode("utf-8", "replace")).hexdigest()
+    return f"markdown:{engine}:{page['url']}:{validator}"
+
+
+async def get_page_markdown(page: dict, engine: str = "auto") -> str:
+    """
+    获取页面简化后的markdown，依次查找内存缓存、磁盘缓存，都未命中时才解析HTML。
+    
+    Args:
+        page: fetch_page返回的页面记录
+        engine: 提取引擎，auto/readability/fast
+        
+    Returns:
+        简化后的markdown内容
+    """
+    engine = resolve_extract_engine(engine, page["text"])
+    key = _markdown_cache_key(page, engine)
+    content = _markdown_memory_cache.get(key)
+    if content is not None:
+        _markdown_memory_cache.move_to_end(key)
+        return content
+
+    cache = get_response_cache()
+    if cache is not None:
+        content = await asyncio.to_thread(cache.get, key)
+    if content is None:
+        content = await extract_content_async(page["text"], engine)
+        if cache is not None and not content.startswith("<error>Page simplification timed out"):
+            await asyncio.to_thread(cache.set, key, content)
+
+    _markdown_memory_cache[key] = content
+    while len(_markdown_memory_cache) > MARKDOWN_MEMORY_CACHE_ENTRIES:
+        _markdown_memory_cache.popitem(last=False)
+    return content
+
+
 def get_robots_txt_url(url: str) -> str:
     """获取网站的robots.txt文件URL。
     
@@ -64,48 +614,121 @@ def get_robots_txt_url(url: str) -> str:
     return robots_url
 
 
-async def check_may_autonomously_fetch_url(url: str, user_agent: str) -> None:
-    """
-    检查URL是否可以根据robots.txt规则被用户代理抓取。
-    如果不允许，则抛出McpError异常。
-    
-    Args:
-        url: 要检查的URL
-        user_agent: 用户代理字符串
-    """
-    from httpx import AsyncClient, HTTPError
+# 按origin缓存解析后的robots.txt规则，在所有工具调用间共享
+_robots_cache: dict = {}
+# 正在下载中的robots.txt，同一origin的并发请求共用一次下载
+_robots_inflight: dict = {}
 
-    # 获取robots.txt文件的URL
-    robot_txt_url = get_robots_txt_url(url)
 
-    async with AsyncClient() as client:
+def _robots_ttl(response) -> float:
+    """根据HTTP缓存头计算robots.txt的有效期"""
+    if 400 <= response.status_code < 500:
+        return ROBOTS_NEGATIVE_TTL
+    if response.status_code >= 500:
+        return ROBOTS_ERROR_TTL
+
+    cache_control = response.headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return min(int(match.group(1)), ROBOTS_CACHE_MAX_TTL)
+    expires = response.headers.get("expires")
+    if expires:
+        try:
+            date = response.headers.get("date")
+            now = parsedate_to_datetime(date) if date else None
+            expires_at = parsedate_to_datetime(expires)
+            delta = (expires_at - now).total_seconds() if now else expires_at.timestamp() - time.time()
+            return max(0, min(delta, ROBOTS_CACHE_MAX_TTL))
+        except (TypeError, ValueError):
+            pass
+    return ROBOTS_CACHE_TTL
+
+
+async def _download_robots_txt(robot_txt_url: str, user_agent: str) -> dict:
+    """下载并解析robots.txt，返回缓存条目"""
+    from httpx import HTTPError
+
+    # 与随后的页面请求复用同一连接
+    client = get_http_client()
+    async with host_slot(robot_txt_url):
         try:
             response = await client.get(
                 robot_txt_url,
                 follow_redirects=True,
                 headers={"User-Agent": user_agent},
+                timeout=5,
             )
         except HTTPError:
             raise McpError(
                 INTERNAL_ERROR,
                 f"Failed to fetch robots.txt {robot_txt_url} due to a connection issue",
             )
-        if response.status_code in (401, 403):
-            raise McpError(
-                INTERNAL_ERROR,
-                f"When fetching robots.txt ({robot_txt_url}), received status {response.status_code} so assuming that autonomous fetching is not allowed, the user can try manually fetching by using the fetch prompt",
-            )
-        elif 400 <= response.status_code < 500:
-            return
+
+    entry = {
+        "status": response.status_code,
+        "robot_txt": None,
+        "parser": None,
+        "expires_at": time.monotonic() + _robots_ttl(response),
+    }
+    if not 400 <= response.status_code < 500:
         robot_txt = response.text
-    # 处理robots.txt内容，移除注释行
-    processed_robot_txt = "\n".join(
-        line for line in robot_txt.splitlines() if not line.strip().startswith("#")
-    )
-    # 使用Protego解析robots.txt
-    robot_parser = Protego.parse(processed_robot_txt)
+        # 处理robots.txt内容，移除注释行
+        processed_robot_txt = "\n".join(
+            line for line in robot_txt.splitlines() if not line.strip().startswith("#")
+        )
+        entry["robot_txt"] = robot_txt
+        # 使用Protego解析robots.txt
+        entry["parser"] = Protego.parse(processed_robot_txt)
+    return entry
+
+
+async def get_robots_rules(url: str, user_agent: str) -> dict:
+    """获取URL所在origin的robots.txt规则，优先使用未过期的缓存"""
+    robot_txt_url = get_robots_txt_url(url)
+    entry = _robots_cache.get(robot_txt_url)
+    if entry is not None and entry["expires_at"] > time.monotonic():
+        return entry
+
+    task = _robots_inflight.get(robot_txt_url)
+    if task is None:
+        task = asyncio.ensure_future(_download_robots_txt(robot_txt_url, user_agent))
+        _robots_inflight[robot_txt_url] = task
+        task.add_done_callback(lambda _: _robots_inflight.pop(robot_txt_url, None))
+    # shield避免某个调用方被取消时中断其他调用方共享的下载
+    entry = await asyncio.shield(task)
+
+    _robots_cache.pop(robot_txt_url, None)
+    _robots_cache[robot_txt_url] = entry
+    while len(_robots_cache) > ROBOTS_CACHE_MAX_ENTRIES:
+        _robots_cache.pop(next(iter(_robots_cache)))
+    return entry
+
+
+async def check_may_autonomously_fetch_url(url: str, user_agent: str) -> None:
+    """
+    检查URL是否可以根据robots.txt规则被用户代理抓取。
+    如果不允许，则抛出McpError异常。
+    
+    Args:
+        url: 要检查的URL
+        user_agent: 用户代理字符串
+    """
+    # 获取robots.txt文件的URL
+    robot_txt_url = get_robots_txt_url(url)
+    rules = await get_robots_rules(url, user_agent)
+
+    if rules["status"] in (401, 403):
+        raise McpError(
+            INTERNAL_ERROR,
+            f"When fetching robots.txt ({robot_txt_url}), received status {rules['status']} so assuming that autonomous fetching is not allowed, the user can try manually fetching by using the fetch prompt",
+        )
+    elif 400 <= rules["status"] < 500:
+        return
+    robot_txt = rules["robot_txt"]
     # 检查是否允许抓取
-    if not robot_parser.can_fetch(str(url), user_agent):
+    if not rules["parser"].can_fetch(str(url), user_agent):
         raise McpError(
             INTERNAL_ERROR,
             f"The sites robots.txt ({robot_txt_url}), specifies that autonomous fetching of this page is not allowed, "
@@ -117,53 +740,210 @@ async def check_may_autonomously_fetch_url(url: str, user_agent: str) -> None:
         )
 
 
-async def fetch_url(
-    url: str, user_agent: str, force_raw: bool = False
-) -> Tuple[str, str]:
+def _response_freshness(response) -> float | None:
+    """根据Cache-Control计算响应的新鲜期，返回None表示不可缓存"""
+    cache_control = response.headers.get("cache-control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return min(int(match.group(1)), FETCH_CACHE_MAX_AGE)
+    return FETCH_CACHE_FRESH_SECONDS
+
+
+def _is_html(head: str, content_type: str) -> bool:
+    return "<html" in head[:100] or "text/html" in content_type or not content_type
+
+
+def _is_binary(head_bytes: bytes, content_type: str) -> bool:
+    """根据Content-Type和首部字节判断是否为二进制内容"""
+    if content_type.lower().startswith(BINARY_CONTENT_TYPES):
+        return True
+    return b"\x00" in head_bytes[:SNIFF_BYTES]
+
+
+def _covers(record: dict, max_chars: int | None, force_raw: bool) -> bool:
+    """缓存的记录是否包含本次请求所需的内容"""
+    if not record.get("truncated") or record.get("capped") or record.get("binary"):
+        return True
+    # 提前停止的记录只有开头部分，不能用于HTML简化
+    if not force_raw and _is_html(record["text"], record["content_type"]):
+        return False
+    return max_chars is not None and len(record["text"]) >= max_chars
+
+
+async def _read_body(response, max_chars: int | None, force_raw: bool) -> dict:
     """
-    抓取URL并返回准备好供LLM使用的内容，以及包含状态信息的前缀字符串。
+    流式读取响应体，最多读取FETCH_MAX_BYTES字节。
+    
+    读到首个数据块后即判断内容类型：二进制内容立即停止；不需要简化的内容
+    在读够max_chars个字符后停止，内存占用与请求窗口成正比。
+    """
+    content_type = response.headers.get("content-type", "")
+    encoding = response.encoding or "utf-8"
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    parts = []
+    chars = 0
+    received = 0
+    char_limit = None
+    truncated = capped = binary = False
+    async for chunk in response.aiter_bytes():
+        if received == 0:
+            if _is_binary(chunk, content_type):
+                binary = truncated = True
+                break
+            head = chunk[:SNIFF_BYTES].decode(encoding, errors="replace")
+            if force_raw or not _is_html(head, content_type):
+                char_limit = max_chars
+        if received + len(chunk) > FETCH_MAX_BYTES:
+            chunk = chunk[: FETCH_MAX_BYTES - received]
+            truncated = capped = True
+        received += len(chunk)
+        text = decoder.decode(chunk)
+        parts.append(text)
+        chars += len(text)
+        if capped:
+            break
+        if char_limit is not None and chars >= char_limit:
+            truncated = True
+            break
+
+    if not truncated:
+        parts.append(decoder.decode(b"", final=True))
+    return {
+        "text": "".join(parts),
+        "content_type": content_type,
+        "truncated": truncated,
+        "capped": capped,
+        "binary": binary,
+        "bytes": received,
+    }
+
+
+async def fetch_page(
+    url: str,
+    user_agent: str,
+    max_chars: int | None = None,
+    force_raw: bool = False,
+    before_request: Callable[[], Awaitable[None]] | None = None,
+) -> dict:
+    """
+    抓取页面原始内容，优先使用磁盘缓存。
+    
+    新鲜期内直接返回缓存；过期后携带ETag/Last-Modified发送条件请求，
+    服务器返回304时复用缓存内容。响应体以流式读取，受FETCH_MAX_BYTES限制。
     
     Args:
         url: 要抓取的URL
         user_agent: 用户代理字符串
-        force_raw: 是否强制返回原始HTML内容而不进行简化
+        max_chars: 不需要简化时最多需要的字符数，读够即停止下载
+        force_raw: 是否返回原始内容（不做HTML简化）
+        before_request: 真正发起网络请求前等待的回调，命中新鲜缓存时不会调用
         
     Returns:
-        包含内容和前缀的元组
+        包含text、content_type、etag、last_modified等字段的页面记录，url为重定向后的最终地址
     """
-    from httpx import AsyncClient, HTTPError
+    from httpx import HTTPError
+
+    cache = get_response_cache()
+    cached = await asyncio.to_thread(cache.get, url) if cache is not None else None
+    if cached is not None and not _covers(cached, max_chars, force_raw):
+        # 之前只下载了部分内容，不足以满足本次请求
+        cached = None
+    if cached is not None and cached["expires_at"] > time.time():
+        return cached
 
-    async with AsyncClient() as client:
+    headers = {"User-Agent": user_agent}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    if before_request is not None:
+        await before_request()
+    client = get_http_client()
+    async with host_slot(url):
         try:
-            response = await client.get(
+            async with client.stream(
+                "GET",
                 url,
                 follow_redirects=True,
-                headers={"User-Agent": user_agent},
+                headers=headers,
                 timeout=30,
-            )
+            ) as response:
+                freshness = _response_freshness(response)
+                if response.status_code == 304 and cached is not None:
+                    # 内容未变化，仅刷新有效期
+                    record = {**cached, "expires_at": time.time() + (freshness or 0)}
+                else:
+                    if response.status_code >= 400:
+                        raise McpError(
+                            INTERNAL_ERROR,
+                            f"Failed to fetch {url} - status code {response.status_code}",
+                        )
+                    body = await _read_body(response, max_chars, force_raw)
+                    record = {
+                        "url": str(response.url),
+                        **body,
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                        "fetched_at": time.time(),
+                        "expires_at": time.time() + (freshness or 0),
+                    }
         except HTTPError as e:
             raise McpError(INTERNAL_ERROR, f"Failed to fetch {url}: {e!r}")
-        if response.status_code >= 400:
-            raise McpError(
-                INTERNAL_ERROR,
-                f"Failed to fetch {url} - status code {response.status_code}",
-            )
 
-        page_raw = response.text
+    if cache is not None and freshness is not None:
+        await asyncio.to_thread(cache.set, url, record)
+    return record
+
+
+async def fetch_url(
+    url: str,
+    user_agent: str,
+    force_raw: bool = False,
+    max_chars: int | None = None,
+    engine: str = "auto",
+) -> Tuple[str, str]:
+    """
+    抓取URL并返回准备好供LLM使用的内容，以及包含状态信息的前缀字符串。
+    
+    Args:
+        url: 要抓取的URL
+        user_agent: 用户代理字符串
+        force_raw: 是否强制返回原始HTML内容而不进行简化
+        max_chars: 调用方最多需要的字符数（start_index + max_length），原始内容读够即停止下载
+        engine: HTML提取引擎，auto按页面大小选择
+        
+    Returns:
+        包含内容和前缀的元组
+    """
+    page = await fetch_page(url, user_agent, max_chars=max_chars, force_raw=force_raw)
+    page_raw = page["text"]
 
     # 检查内容类型，判断是否为HTML
-    content_type = response.headers.get("content-type", "")
-    is_page_html = (
-        "<html" in page_raw[:100] or "text/html" in content_type or not content_type
-    )
+    content_type = page["content_type"]
+    if page.get("binary"):
+        return "", f"Content type {content_type or 'unknown'} is binary and cannot be returned as text.\n"
 
-    # 对HTML内容进行简化处理，除非强制要求原始内容
-    if is_page_html and not force_raw:
-        return extract_content_from_html(page_raw), ""
+    prefix = ""
+    if page.get("capped"):
+        prefix = f"Page is larger than {FETCH_MAX_BYTES} bytes, only the first {FETCH_MAX_BYTES} bytes were downloaded.\n"
+
+    # 对HTML内容进行简化处理，除非强制要求原始内容；start_index续取时直接命中缓存
+    if _is_html(page_raw, content_type) and not force_raw:
+        return await get_page_markdown(page, engine), prefix
 
     return (
         page_raw,
-        f"Content type {content_type} cannot be simplified to markdown, but here is the raw content:\n",
+        prefix + f"Content type {content_type} cannot be simplified to markdown, but here is the raw content:\n",
     )
 
 
@@ -195,6 +975,378 @@ class Fetch(BaseModel):
             description="Get the actual HTML content if the requested page, without simplification.",
         ),
     ]
+    engine: Annotated[
+        Literal["auto", "readability", "fast"],
+        Field(
+            default="auto",
+            description="HTML extraction engine: readability is more accurate, fast is much quicker on large pages, auto picks by page size.",
+        ),
+    ]
+
+
+def _crawl_store_key(url: str) -> str:
+    return f"crawl:{normalize_crawl_url(url)}"
+
+
+async def store_crawled_page(url: str, markdown: str, content_hash: str) -> None:
+    """把爬取到的markdown写入本地存储，供之后的fetch调用直接读取"""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    record = {"markdown": markdown, "content_hash": content_hash, "crawled_at": time.time()}
+    await asyncio.to_thread(cache.set, _crawl_store_key(url), record, expire=CRAWL_STORE_TTL)
+
+
+async def get_crawled_markdown(url: str) -> str | None:
+    """读取爬取存储中的markdown，不存在或已过期时返回None"""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    record = await asyncio.to_thread(cache.get, _crawl_store_key(url))
+    return record["markdown"] if record else None
+
+
+def normalize_crawl_url(url: str) -> str:
+    """去掉片段，统一scheme和主机名大小写，用于frontier去重"""
+    url, _ = urldefrag(url.strip())
+    parsed = urlparse(url)
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path or "/", parsed.params, parsed.query, ""))
+
+
+def default_crawl_prefix(path: str) -> str:
+    """起始URL对应的默认路径前缀：/docs/及/docs保持原样，/docs/intro.html取所在目录"""
+    if not path or path.endswith("/"):
+        return path or "/"
+    directory, _, last = path.rpartition("/")
+    return f"{directory}/" if "." in last else path
+
+
+def extract_links(html: str, base_url: str) -> list[str]:
+    """提取页面中的超链接并转换为绝对URL"""
+    import lxml.html
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (ValueError, lxml.etree.ParserError):
+        return []
+    base = root.xpath("//base/@href")
+    base_url = urljoin(base_url, base[0]) if base else base_url
+    return [urljoin(base_url, href) for href in root.xpath("//a/@href") if not href.startswith(("mailto:", "javascript:", "tel:"))]
+
+
+class Crawl(BaseModel):
+    """爬取网站栏目的参数类。"""
+
+    url: Annotated[AnyUrl, Field(description="URL to start crawling from")]
+    path_prefix: Annotated[
+        str | None,
+        Field(
+            default=None,
+            description="Only follow links on the same host whose path starts with this prefix. Defaults to the start URL's path (its directory if it names a file).",
+        ),
+    ]
+    max_pages: Annotated[
+        int,
+        Field(default=CRAWL_DEFAULT_MAX_PAGES, description="Maximum number of pages to fetch.", gt=0, le=CRAWL_MAX_PAGES),
+    ]
+    max_depth: Annotated[
+        int,
+        Field(default=CRAWL_DEFAULT_MAX_DEPTH, description="Maximum link depth from the start URL.", ge=0, le=CRAWL_MAX_DEPTH),
+    ]
+    delay: Annotated[
+        float,
+        Field(
+            default=CRAWL_DEFAULT_DELAY,
+            description="Minimum seconds between requests to the same host; a larger robots.txt Crawl-delay takes precedence.",
+            ge=0,
+        ),
+    ]
+    workers: Annotated[
+        int,
+        Field(default=4, description="Number of concurrent crawl workers.", gt=0, le=CRAWL_MAX_WORKERS),
+    ]
+    engine: Annotated[
+        Literal["auto", "readability", "fast"],
+        Field(default="auto", description="HTML extraction engine."),
+    ]
+    deadline: Annotated[
+        float,
+        Field(
+            default=CRAWL_DEFAULT_DEADLINE,
+            description="Overall time limit in seconds.",
+            gt=0,
+            le=CRAWL_MAX_DEADLINE,
+        ),
+    ]
+
+
+class _PolitenessScheduler:
+    """按主机控制请求间隔：同一主机的两次请求之间至少间隔delay秒"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next_allowed: dict = {}
+        self._locks: dict = {}
+
+    async def wait(self, url: str, crawl_delay: float | None = None) -> None:
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            ready_at = self._next_allowed.get(host, now)
+            if ready_at > now:
+                await asyncio.sleep(ready_at - now)
+            self._next_allowed[host] = time.monotonic() + max(self.delay, crawl_delay or 0)
+
+
+async def crawl_site(
+    start_url: str,
+    user_agent: str,
+    path_prefix: str | None = None,
+    max_pages: int = CRAWL_DEFAULT_MAX_PAGES,
+    max_depth: int = CRAWL_DEFAULT_MAX_DEPTH,
+    delay: float = CRAWL_DEFAULT_DELAY,
+    workers: int = 4,
+    engine: str = "auto",
+    deadline: float = CRAWL_DEFAULT_DEADLINE,
+    check_robots: bool = True,
+) -> dict:
+    """
+    从start_url开始广度优先爬取同一主机、路径以path_prefix开头的页面。
+    
+    每个页面的markdown写入本地存储；内容哈希相同的页面只保留第一个且不再展开其链接。
+    
+    Returns:
+        包含pages（逐页结果）、duplicates、errors和elapsed的统计信息
+    """
+    start_url = normalize_crawl_url(start_url)
+    start = urlparse(start_url)
+    if path_prefix is None:
+        path_prefix = default_crawl_prefix(start.path)
+
+    def in_scope(url: str) -> bool:
+        parsed = urlparse(url)
+        return (
+            parsed.scheme in ("http", "https")
+            and parsed.netloc == start.netloc
+            and parsed.path.startswith(path_prefix)
+            and not parsed.path.lower().endswith(CRAWL_SKIP_EXTENSIONS)
+        )
+
+    frontier: asyncio.Queue = asyncio.Queue()
+    seen = {start_url}
+    content_hashes: dict = {}
+    scheduler = _PolitenessScheduler(delay)
+    stats = {"pages": [], "duplicates": 0, "errors": 0}
+    claimed = 0
+    frontier.put_nowait((start_url, 0))
+
+    async def crawl_one(url: str, depth: int) -> None:
+        crawl_delay = None
+        if check_robots:
+            try:
+                await check_may_autonomously_fetch_url(url, user_agent)
+            except McpError:
+                stats["pages"].append({"url": url, "depth": depth, "status": "skipped (robots.txt)"})
+                return
+            rules = await get_robots_rules(url, user_agent)
+            if rules["parser"] is not None:
+                crawl_delay = rules["parser"].crawl_delay(user_agent)
+
+        # 仅在真正发起网络请求时遵守请求间隔，命中缓存的页面不必等待
+        page = await fetch_page(url, user_agent, before_request=lambda: scheduler.wait(url, crawl_delay))
+        if page.get("binary") or not _is_html(page["text"], page["content_type"]):
+            stats["pages"].append({"url": url, "depth": depth, "status": "skipped (not HTML)"})
+            return
+        markdown = await get_page_markdown(page, engine)
+        content_hash = hashlib.sha256(markdown.encode("utf-8", "replace")).hexdigest()
+        if content_hash in content_hashes:
+            stats["duplicates"] += 1
+            stats["pages"].append({"url": url, "depth": depth, "status": f"duplicate of {content_hashes[content_hash]}"})
+            return
+        content_hashes[content_hash] = url
+        await store_crawled_page(url, markdown, content_hash)
+        stats["pages"].append({"url": url, "depth": depth, "status": "ok", "chars": len(markdown)})
+
+        if depth < max_depth:
+            for link in await asyncio.to_thread(extract_links, page["text"], page.get("url", url)):
+                link = normalize_crawl_url(link)
+                if link not in seen and in_scope(link):
+                    seen.add(link)
+                    frontier.put_nowait((link, depth + 1))
+
+    async def worker() -> None:
+        nonlocal claimed
+        while True:
+            url, depth = await frontier.get()
+            try:
+                if claimed >= max_pages:
+                    continue
+                claimed += 1
+                await crawl_one(url, depth)
+            except Exception as e:
+                stats["errors"] += 1
+                stats["pages"].append({"url": url, "depth": depth, "status": f"error: {e}"})
+            finally:
+                frontier.task_done()
+
+    started = time.monotonic()
+    tasks = [asyncio.ensure_future(worker()) for _ in range(workers)]
+    try:
+        await asyncio.wait_for(frontier.join(), deadline)
+        stats["timed_out"] = False
+    except asyncio.TimeoutError:
+        stats["timed_out"] = True
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    stats["elapsed"] = time.monotonic() - started
+    stats["path_prefix"] = path_prefix
+    stats["frontier_remaining"] = frontier.qsize()
+    return stats
+
+
+def format_crawl_report(start_url: str, stats: dict) -> str:
+    stored = [page for page in stats["pages"] if page["status"] == "ok"]
+    lines = [
+        f"Crawled {start_url} (prefix {stats['path_prefix']}) in {stats['elapsed']:.1f}s: "
+        f"{len(stored)} pages stored, {stats['duplicates']} duplicates, {stats['errors']} errors"
+        + (", stopped at deadline" if stats["timed_out"] else "")
+        + (f", {stats['frontier_remaining']} URLs left in frontier" if stats["frontier_remaining"] else ""),
+        "",
+        "Stored pages can be read with the fetch tool, which serves them from the local crawl store:",
+    ]
+    for page in stats["pages"]:
+        detail = f"{page['chars']} chars" if page["status"] == "ok" else page["status"]
+        lines.append(f"- [depth {page['depth']}] {page['url']} ({detail})")
+    return "\n".join(lines)
+
+
+class FetchMany(BaseModel):
+    """批量抓取URL的参数类。"""
+
+    urls: Annotated[
+        list[AnyUrl],
+        Field(
+            description="URLs to fetch",
+            min_length=1,
+            max_length=FETCH_MANY_MAX_URLS,
+        ),
+    ]
+    max_length: Annotated[
+        int,
+        Field(
+            default=2000,
+            description="Maximum number of characters to return per URL.",
+            gt=0,
+            lt=1000000,
+        ),
+    ]
+    raw: Annotated[
+        bool,
+        Field(
+            default=False,
+            description="Get the actual HTML content of the requested pages, without simplification.",
+        ),
+    ]
+    engine: Annotated[
+        Literal["auto", "readability", "fast"],
+        Field(
+            default="auto",
+            description="HTML extraction engine: readability is more accurate, fast is much quicker on large pages, auto picks by page size.",
+        ),
+    ]
+    deadline: Annotated[
+        float,
+        Field(
+            default=FETCH_MANY_DEFAULT_DEADLINE,
+            description="Overall time limit in seconds; URLs not finished by then are reported as errors.",
+            gt=0,
+            le=FETCH_MANY_MAX_DEADLINE,
+        ),
+    ]
+
+
+async def fetch_for_tool(
+    url: str,
+    user_agent: str,
+    max_length: int,
+    start_index: int = 0,
+    raw: bool = False,
+    engine: str = "auto",
+    check_robots: bool = True,
+) -> str:
+    """
+    按fetch工具的约定抓取单个URL：检查robots.txt、抓取、按窗口截断。
+    
+    Returns:
+        返回给模型的文本
+    """
+    # 检查robots.txt限制（除非忽略）
+    if check_robots:
+        await check_may_autonomously_fetch_url(url, user_agent)
+
+    # 已爬取的页面直接从本地存储读取，否则抓取URL内容（多读一个字符用于判断是否还有后续内容）
+    stored = None if raw else await get_crawled_markdown(url)
+    if stored is not None:
+        content, prefix = stored, ""
+    else:
+        content, prefix = await fetch_url(
+            url,
+            user_agent,
+            force_raw=raw,
+            max_chars=start_index + max_length + 1,
+            engine=engine,
+        )
+    # 处理长内容截断
+    if len(content) > max_length:
+        content = content[start_index : start_index + max_length]
+        content += f"\n\n<error>Content truncated. Call the fetch tool with a start_index of {start_index + max_length} to get more content.</error>"
+    return f"{prefix}Contents of {url}:\n{content}"
+
+
+async def fetch_many(
+    urls: list[str],
+    user_agent: str,
+    max_length: int,
+    raw: bool = False,
+    engine: str = "auto",
+    deadline: float = FETCH_MANY_DEFAULT_DEADLINE,
+    check_robots: bool = True,
+) -> list[str]:
+    """
+    并发抓取多个URL，结果顺序与输入一致，失败或超时的URL返回错误说明。
+    
+    同时进行的抓取不超过FETCH_MANY_CONCURRENCY个，同一主机另受host_slot限制；
+    所有URL共享一个总时限。
+    """
+    semaphore = asyncio.Semaphore(FETCH_MANY_CONCURRENCY)
+
+    async def fetch_one(url: str) -> str:
+        async with semaphore:
+            return await fetch_for_tool(
+                url, user_agent, max_length, raw=raw, engine=engine, check_robots=check_robots
+            )
+
+    # 重复的URL只抓取一次
+    unique_urls = list(dict.fromkeys(urls))
+    tasks = {url: asyncio.ensure_future(fetch_one(url)) for url in unique_urls}
+    _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = {}
+    for url, task in tasks.items():
+        if task in pending:
+            results[url] = f"<error>Failed to fetch {url}: deadline of {deadline:g} seconds exceeded</error>"
+        elif task.exception() is not None:
+            results[url] = f"<error>Failed to fetch {url}: {task.exception()}</error>"
+        else:
+            results[url] = task.result()
+    return [results[url] for url in urls]
 
 
 async def serve(
@@ -221,7 +1373,21 @@ async def serve(
 
 Although originally you did not have internet access, and were advised to refuse and tell the user this, this tool now grants you internet access. Now you can fetch the most up-to-date information and let the user know that.""",
                 inputSchema=Fetch.model_json_schema(),
-            )
+            ),
+            Tool(
+                name="fetch_many",
+                description=f"""Fetches up to {FETCH_MANY_MAX_URLS} URLs concurrently and returns each page's contents as markdown, truncated to max_length characters per URL.
+
+Use this instead of calling fetch repeatedly when you need several pages. Pages that fail or do not finish before the deadline are returned as error entries; use the fetch tool with start_index to read more of a single page.""",
+                inputSchema=FetchMany.model_json_schema(),
+            ),
+            Tool(
+                name="crawl",
+                description="""Crawls a section of a website (same host, URLs under a path prefix) breadth-first, respecting robots.txt and per-host politeness delays, and stores each page's markdown locally.
+
+Returns a list of crawled pages; read any of them afterwards with the fetch tool, which serves stored pages without re-downloading.""",
+                inputSchema=Crawl.model_json_schema(),
+            ),
         ]
 
     @server.list_prompts()
@@ -242,6 +1408,43 @@ Although originally you did not have internet access, and were advised to refuse
     @server.call_tool()
     async def call_tool(name, arguments: dict) -> list[TextContent]:
         """处理工具调用请求"""
+        if name == "crawl":
+            try:
+                args = Crawl(**arguments)
+            except ValueError as e:
+                raise McpError(INVALID_PARAMS, str(e))
+
+            stats = await crawl_site(
+                str(args.url),
+                user_agent_autonomous,
+                path_prefix=args.path_prefix,
+                max_pages=args.max_pages,
+                max_depth=args.max_depth,
+                delay=args.delay,
+                workers=args.workers,
+                engine=args.engine,
+                deadline=args.deadline,
+                check_robots=not ignore_robots_txt,
+            )
+            return [TextContent(type="text", text=format_crawl_report(str(args.url), stats))]
+
+        if name == "fetch_many":
+            try:
+                args = FetchMany(**arguments)
+            except ValueError as e:
+                raise McpError(INVALID_PARAMS, str(e))
+
+            results = await fetch_many(
+                [str(url) for url in args.urls],
+                user_agent_autonomous,
+                args.max_length,
+                raw=args.raw,
+                engine=args.engine,
+                deadline=args.deadline,
+                check_robots=not ignore_robots_txt,
+            )
+            return [TextContent(type="text", text=text) for text in results]
+
         try:
             # 验证参数
             args = Fetch(**arguments)
@@ -252,19 +1455,16 @@ Although originally you did not have internet access, and were advised to refuse
         if not url:
             raise McpError(INVALID_PARAMS, "URL is required")
 
-        # 检查robots.txt限制（除非忽略）
-        if not ignore_robots_txt:
-            await check_may_autonomously_fetch_url(url, user_agent_autonomous)
-
-        # 抓取URL内容
-        content, prefix = await fetch_url(
-            url, user_agent_autonomous, force_raw=args.raw
+        text = await fetch_for_tool(
+            url,
+            user_agent_autonomous,
+            args.max_length,
+            start_index=args.start_index,
+            raw=args.raw,
+            engine=args.engine,
+            check_robots=not ignore_robots_txt,
         )
-        # 处理长内容截断
-        if len(content) > args.max_length:
-            content = content[args.start_index : args.start_index + args.max_length]
-            content += f"\n\n<error>Content truncated. Call the fetch tool with a start_index of {args.start_index + args.max_length} to get more content.</error>"
-        return [TextContent(type="text", text=f"{prefix}Contents of {url}:\n{content}")]
+        return [TextContent(type="text", text=text)]
 
     @server.get_prompt()
     async def get_prompt(name: str, arguments: dict | None) -> GetPromptResult:
@@ -297,10 +1497,16 @@ Although originally you did not have internet access, and were advised to refuse
             ],
         )
 
-    # 创建初始化选项并启动服务器
+    # 创建初始化选项并启动服务器，所有工具调用共享同一个HTTP连接池
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    get_http_client()
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        await close_http_client()
+        close_response_cache()
+        await shutdown_extract_pools()
 
 
 # from .server import serve
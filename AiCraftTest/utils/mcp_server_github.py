@@ -5,9 +5,13 @@ import os
 import sys
 import re
 import base64
+import getpass
+import hashlib
+import tempfile
 import time
 import asyncio
 import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime
 from enum import Enum
 
@@ -37,6 +41,323 @@ MAX_RESULTS = 5
 MAX_FILE_SIZE = 100000  # 最大文件大小，约100KB
 REQUEST_TIMEOUT = 30  # 请求超时时间(秒)
 
+# 共享HTTP客户端的连接池配置（所有请求都发往api.github.com）
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 60.0
+
+# 条件请求缓存：目录、容量上限（超出后按LRU淘汰）
+def _default_cache_dir() -> str:
+    """当前用户私有的缓存目录；缓存中可能有私有仓库的数据，不放在共享的临时目录下"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    if not os.path.isabs(base):
+        # 无法确定主目录时退回临时目录，按用户名区分
+        base = os.path.join(tempfile.gettempdir(), f"mcp-cache-{getpass.getuser()}")
+    return os.path.join(base, "mcp-github")
+
+
+GITHUB_CACHE_DIR = os.environ.get("MCP_GITHUB_CACHE_DIR") or _default_cache_dir()
+GITHUB_CACHE_SIZE_LIMIT = int(os.environ.get("MCP_GITHUB_CACHE_SIZE_MB", "128")) * 1024 * 1024
+# 可变资源的缓存条目保留时间（秒），期间带If-None-Match重新验证，304不计入速率限制
+GITHUB_CACHE_MAX_AGE = 7 * 86400
+# 按完整SHA定位的资源不会变化，有效期内直接使用缓存而不发请求
+GITHUB_IMMUTABLE_TTL = 30 * 86400
+
+# 速率限制调度：剩余配额低于上限的该比例时，把请求均匀分布到重置时间之前
+RATE_LIMIT_PACE_RATIO = 0.1
+# 排队等待配额的最长时间（秒），超过则直接报错
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("MCP_GITHUB_RATE_LIMIT_MAX_WAIT", "60"))
+# 同一令牌、同一资源族的最大并发请求数，并发过高会触发次级限制
+RATE_LIMIT_MAX_CONCURRENT = 4
+# 被限流后排队重试的次数
+RATE_LIMIT_RETRIES = 2
+# 次级限制未给出Retry-After时的等待时间（秒）
+SECONDARY_LIMIT_WAIT = 60
+
+# GraphQL批量查询：一次返回的提交数、分支数上限，概览中README截取的字符数
+GRAPHQL_MAX_COMMITS = 100
+GRAPHQL_MAX_BRANCHES = 100
+OVERVIEW_README_CHARS = 3000
+# 无令牌的REST回退中单独获取变更统计的提交数：每个提交一次请求，匿名配额每小时仅60次
+REST_COMMIT_STATS_LIMIT = 5
+README_NAMES = ("README.md", "readme.md", "README.rst", "README")
+
+# 一次查询获取存储库信息、最近提交（含变更统计）、分支和README，
+# 各部分可通过with*变量关闭；README路径无法在查询内拼接，由调用方按README_NAMES传入
+REPO_BUNDLE_QUERY = """
+query($owner: String!, $repo: String!, $rev: String!, $commits: Int!, $since: GitTimestamp,
+      $branches: Int!, $withBranches: Boolean!, $withReadme: Boolean!,
+      $readme0: String!, $readme1: String!, $readme2: String!, $readme3: String!) {
+  repository(owner: $owner, name: $repo) {
+    nameWithOwner
+    description
+    url
+    stargazerCount
+    forkCount
+    issues(states: OPEN) { totalCount }
+    primaryLanguage { name }
+    licenseInfo { name }
+    createdAt
+    updatedAt
+    defaultBranchRef { name }
+    head: object(expression: $rev) {
+      ... on Commit {
+        history(first: $commits, since: $since) {
+          nodes {
+            oid
+            message
+            committedDate
+            url
+            author { name user { login } }
+            additions
+            deletions
+            changedFilesIfAvailable
+          }
+        }
+      }
+    }
+    refs(refPrefix: "refs/heads/", first: $branches, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) @include(if: $withBranches) {
+      totalCount
+      nodes { name target { oid } }
+    }
+    readme0: object(expression: $readme0) @include(if: $withReadme) { ... on Blob { text } }
+    readme1: object(expression: $readme1) @include(if: $withReadme) { ... on Blob { text } }
+    readme2: object(expression: $readme2) @include(if: $withReadme) { ... on Blob { text } }
+    readme3: object(expression: $readme3) @include(if: $withReadme) { ... on Blob { text } }
+  }
+}
+"""
+
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}$")
+_IMMUTABLE_ENDPOINT = re.compile(r"^/repos/[^/]+/[^/]+/(?:commits/[0-9a-f]{40}|compare/[0-9a-f]{40}\.\.\.[0-9a-f]{40}|git/(?:commits|trees|blobs)/[0-9a-f]{40})$")
+
+_request_cache = None
+_http_client = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """创建支持HTTP/2和keep-alive连接池的AsyncClient。
+
+    未安装h2时（pip install httpx[http2]）回退到HTTP/1.1。
+    """
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=REQUEST_TIMEOUT,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端，未通过serve()启动时按需创建"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """关闭共享的HTTP客户端，释放连接池"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_request_cache():
+    """获取GitHub响应的磁盘缓存，未安装diskcache时返回None"""
+    global _request_cache
+    if _request_cache is None:
+        try:
+            from diskcache import Cache
+        except ImportError:
+            return None
+        try:
+            # 仅当前用户可访问；目录已存在且属于其他用户时chmod失败，不使用磁盘缓存
+            os.makedirs(GITHUB_CACHE_DIR, mode=0o700, exist_ok=True)
+            os.chmod(GITHUB_CACHE_DIR, 0o700)
+        except OSError:
+            return None
+        _request_cache = Cache(
+            GITHUB_CACHE_DIR,
+            size_limit=GITHUB_CACHE_SIZE_LIMIT,
+            eviction_policy="least-recently-used",
+        )
+    return _request_cache
+
+
+def close_request_cache() -> None:
+    global _request_cache
+    if _request_cache is not None:
+        _request_cache.close()
+        _request_cache = None
+
+
+def token_identity(token: Optional[str]) -> str:
+    """令牌的不可逆标识，用于区分不同令牌可见的数据，避免把令牌本身写入缓存"""
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def is_immutable_request(endpoint: str, params: Optional[Dict] = None) -> bool:
+    """按完整SHA获取的提交、比较、git对象，以及ref为完整SHA的内容请求，结果不会再变化"""
+    if _IMMUTABLE_ENDPOINT.match(endpoint):
+        return True
+    ref = str((params or {}).get("ref") or "")
+    return bool(_FULL_SHA.match(ref)) and ("/contents/" in endpoint or endpoint.endswith("/readme"))
+
+
+def resource_family(endpoint: str) -> str:
+    """请求所属的速率限制资源族，与响应头X-RateLimit-Resource的取值一致"""
+    if endpoint == "/rate_limit":
+        # 配额查询不消耗配额，单独排队，core耗尽时仍可查询
+        return "rate_limit"
+    if endpoint.startswith("/search/code"):
+        return "code_search"
+    if endpoint.startswith("/search/"):
+        return "search"
+    if endpoint.startswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+def format_reset(timestamp: Optional[float]) -> str:
+    if not timestamp:
+        return "未知"
+    return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+
+
+class RateLimitScheduler:
+    """按（令牌, 资源族）跟踪GitHub速率限制并调度请求
+    
+    根据响应头X-RateLimit-Limit/Remaining/Reset记录配额：配额偏低时按剩余时间均匀放行请求，
+    配额耗尽或遇到次级限制（Retry-After）时排队等待，预计等待超过RATE_LIMIT_MAX_WAIT才报错。
+    每个请求在锁内预约发送时间，等待期间不持有任何锁。
+    """
+    
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+        # 每个资源族一把锁，只保护预约时对配额状态的读写，锁内没有其他await
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def _bucket(self, identity: str, family: str) -> Dict[str, Any]:
+        bucket = self._buckets.get((identity, family))
+        if bucket is None:
+            bucket = self._buckets[(identity, family)] = {
+                "limit": None,
+                "remaining": None,
+                "reset": None,
+                "blocked_until": 0.0,
+                "next_at": 0.0,
+                "requests": 0,
+                "throttled": 0,
+                "waited_seconds": 0.0,
+            }
+        return bucket
+    
+    def _delay(self, bucket: Dict[str, Any], now: float) -> float:
+        """发送下一个请求前需要等待的秒数"""
+        delay = max(0.0, bucket["blocked_until"] - now)
+        remaining, reset, limit = bucket["remaining"], bucket["reset"], bucket["limit"]
+        if remaining is not None and reset and reset > now:
+            if remaining <= 0:
+                delay = max(delay, reset - now)
+            elif limit and remaining < limit * RATE_LIMIT_PACE_RATIO:
+                delay = max(delay, bucket["next_at"] - now)
+        return delay
+    
+    async def _reserve(self, identity: str, family: str) -> float:
+        """预约一次发送并预扣配额，返回需要等待的秒数"""
+        async with self._locks.setdefault(family, asyncio.Lock()):
+            bucket = self._bucket(identity, family)
+            now = time.time()
+            delay = self._delay(bucket, now)
+            if delay > RATE_LIMIT_MAX_WAIT:
+                resume_at = max(bucket["blocked_until"], bucket["reset"] or 0)
+                raise ValueError(
+                    f"GitHub API速率限制已达到（{family}），预计{format_reset(resume_at)}恢复，请稍后再试或提供有效的API令牌"
+                )
+            if delay > 0:
+                bucket["throttled"] += 1
+                bucket["waited_seconds"] += delay
+            send_at = now + delay
+            bucket["requests"] += 1
+            if bucket["remaining"] is not None:
+                # 预扣配额，避免并发请求超发；收到响应后以响应头为准
+                bucket["remaining"] -= 1
+                if bucket["reset"] and bucket["reset"] > send_at and bucket["remaining"] > 0:
+                    # 下一个请求排在本次发送之后，排队的请求按到达顺序依次错开
+                    bucket["next_at"] = send_at + (bucket["reset"] - send_at) / bucket["remaining"]
+            return delay
+    
+    @asynccontextmanager
+    async def slot(self, identity: str, family: str):
+        """获取发送一个请求的许可，必要时排队等待配额"""
+        delay = await self._reserve(identity, family)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        semaphore = self._semaphores.setdefault((identity, family), asyncio.Semaphore(RATE_LIMIT_MAX_CONCURRENT))
+        async with semaphore:
+            yield
+    
+    def record(self, identity: str, family: str, response: httpx.Response) -> bool:
+        """根据响应头更新配额，返回该响应是否因速率限制被拒绝"""
+        headers = response.headers
+        bucket = self._bucket(identity, headers.get("X-RateLimit-Resource", family))
+        if "X-RateLimit-Remaining" in headers:
+            try:
+                bucket["remaining"] = int(headers["X-RateLimit-Remaining"])
+                bucket["limit"] = int(headers.get("X-RateLimit-Limit", 0)) or bucket["limit"]
+                bucket["reset"] = float(headers.get("X-RateLimit-Reset", 0)) or bucket["reset"]
+            except ValueError:
+                pass
+        
+        if response.status_code not in (403, 429):
+            return False
+        retry_after = headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            bucket["blocked_until"] = time.time() + int(retry_after)
+            return True
+        if bucket["remaining"] == 0:
+            return True
+        if "secondary rate limit" in response.text.lower():
+            bucket["blocked_until"] = time.time() + SECONDARY_LIMIT_WAIT
+            return True
+        return False
+    
+    def snapshot(self, identity: str) -> Dict[str, Dict[str, Any]]:
+        """某个令牌在各资源族上的调度状态"""
+        return {
+            family: dict(bucket)
+            for (owner, family), bucket in self._buckets.items()
+            if owner == identity and family != "rate_limit"
+        }
+
+
+rate_limiter = RateLimitScheduler()
+
+
+async def scheduled_request(method: str, url: str, identity: str, family: str, **kwargs) -> httpx.Response:
+    """经速率限制调度发送请求，被限流时排队到配额恢复后重试"""
+    client = get_http_client()
+    for _ in range(RATE_LIMIT_RETRIES + 1):
+        async with rate_limiter.slot(identity, family):
+            response = await client.request(method, url, **kwargs)
+        if not rate_limiter.record(identity, family, response):
+            break
+    return response
+
 
 class RepositoryInfo(BaseModel):
     """存储库信息参数"""
@@ -171,6 +492,13 @@ class GitHubClient:
         }
         if self.token:
             self.headers["Authorization"] = f"token {self.token}"
+        # 条件请求缓存的命中统计：fresh为未发请求直接命中，revalidated为304
+        self.cache_stats = {"fresh": 0, "revalidated": 0, "miss": 0}
+    
+    def _cache_key(self, endpoint: str, params: Optional[Dict]) -> str:
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+        raw = json.dumps([endpoint, items, token_identity(self.token), self.headers["Accept"]])
+        return "github:" + hashlib.sha256(raw.encode()).hexdigest()
     
     async def _make_request(self, endpoint: str, method: str = "GET", params: Dict = None, json_data: Dict = None) -> Dict:
         """发送API请求
@@ -185,32 +513,92 @@ class GitHubClient:
             Dict: API响应
         """
         url = f"{self.BASE_URL}{endpoint}"
+        headers = self.headers
+        
+        # GET请求先查缓存：不可变资源直接返回，其余带上验证器发送条件请求
+        cache = get_request_cache() if method == "GET" else None
+        cache_key = cached = None
+        if cache is not None:
+            cache_key = self._cache_key(endpoint, params)
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            if cached is not None:
+                if cached.get("immutable"):
+                    self.cache_stats["fresh"] += 1
+                    return cached["data"]
+                headers = dict(self.headers)
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                elif cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
         
         try:
-            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-                if method == "GET":
-                    response = await client.get(url, headers=self.headers, params=params)
-                elif method == "POST":
-                    response = await client.post(url, headers=self.headers, params=params, json=json_data)
-                else:
-                    raise ValueError(f"不支持的HTTP方法: {method}")
-                
-                response.raise_for_status()  # 会抛出HTTPStatusError
-                
-                return response.json()
-                
+            if method not in ("GET", "POST"):
+                raise ValueError(f"不支持的HTTP方法: {method}")
+            response = await scheduled_request(
+                method,
+                url,
+                token_identity(self.token),
+                resource_family(endpoint),
+                headers=headers,
+                params=params,
+                json=json_data,
+            )
+            
+            if response.status_code == 304 and cached is not None:
+                self.cache_stats["revalidated"] += 1
+                await asyncio.to_thread(cache.touch, cache_key, GITHUB_CACHE_MAX_AGE)
+                return cached["data"]
+            
+            response.raise_for_status()  # 会抛出HTTPStatusError
+            
+            data = response.json()
+            if cache is not None:
+                self.cache_stats["miss"] += 1
+                await self._store_response(cache, cache_key, endpoint, params, response, data)
+            return data
+            
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 raise ValueError(f"未找到资源: {url}")
-            elif e.response.status_code == 403 and "rate limit exceeded" in e.response.text.lower():
-                raise ValueError("GitHub API速率限制已达到，请稍后再试或提供有效的API令牌")
+            elif e.response.status_code in (403, 429) and "rate limit" in e.response.text.lower():
+                reset = e.response.headers.get("X-RateLimit-Reset")
+                raise ValueError(f"GitHub API速率限制已达到，预计{format_reset(float(reset) if reset else None)}恢复，请稍后再试或提供有效的API令牌")
             else:
                 raise ValueError(f"GitHub API请求失败: {e.response.status_code} - {e.response.text}")
         except httpx.RequestError as e:
             raise ValueError(f"请求错误: {str(e)}")
+        except ValueError:
+            raise
         except Exception as e:
             raise ValueError(f"请求处理错误: {str(e)}")
     
+    async def _store_response(self, cache, cache_key: str, endpoint: str, params: Optional[Dict], response, data) -> None:
+        """缓存带验证器的响应；不可变资源按较长有效期缓存"""
+        immutable = is_immutable_request(endpoint, params)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (immutable or etag or last_modified):
+            return
+        record = {"data": data, "etag": etag, "last_modified": last_modified, "immutable": immutable}
+        expire = GITHUB_IMMUTABLE_TTL if immutable else GITHUB_CACHE_MAX_AGE
+        await asyncio.to_thread(cache.set, cache_key, record, expire=expire)
+    
+    async def get_rate_limit(self) -> Dict:
+        """获取当前令牌的速率限制配额（/rate_limit本身不计入配额）及本地调度状态
+        
+        Returns:
+            Dict: resources为GitHub返回的各资源族配额，scheduler为本地排队统计，cache为条件请求缓存命中统计
+        """
+        try:
+            resources = (await self._make_request("/rate_limit")).get("resources", {})
+        except ValueError:
+            resources = {}
+        return {
+            "resources": resources,
+            "scheduler": rate_limiter.snapshot(token_identity(self.token)),
+            "cache": dict(self.cache_stats),
+        }
+    
     async def get_repo(self, owner: str, repo: str) -> RepoInfo:
         """获取存储库信息
         
@@ -432,6 +820,183 @@ class GitHubClient:
             
         return await self._make_request(endpoint, params=params)
     
+    async def graphql(self, query: str, variables: Dict) -> Dict:
+        """执行GraphQL查询（需要令牌）
+        
+        Args:
+            query: GraphQL查询语句
+            variables: 查询变量
+            
+        Returns:
+            Dict: 响应中的data部分
+        """
+        if not self.token:
+            raise ValueError("GitHub GraphQL API需要提供GITHUB_TOKEN")
+        result = await self._make_request("/graphql", method="POST", json_data={"query": query, "variables": variables})
+        if result.get("errors"):
+            messages = "; ".join(error.get("message", "") for error in result["errors"])
+            raise ValueError(f"GraphQL查询失败: {messages}")
+        return result.get("data") or {}
+    
+    async def get_repo_bundle(
+        self,
+        owner: str,
+        repo: str,
+        ref: Optional[str] = None,
+        since: Optional[str] = None,
+        commits: int = 5,
+        branches: int = 10,
+        include_branches: bool = True,
+        include_readme: bool = True,
+    ) -> Dict:
+        """一次获取存储库信息、最近提交（含增删行数和变更文件数）、分支和README
+        
+        有令牌时使用单个GraphQL查询；无令牌时回退到并发的REST请求，
+        只为最近REST_COMMIT_STATS_LIMIT个提交获取变更统计，其余提交的统计为None。
+        
+        Args:
+            owner: 存储库所有者
+            repo: 存储库名称
+            ref: 提交历史的分支、标签或SHA（默认为默认分支）
+            since: 只返回该时间之后的提交（ISO 8601日期或时间）
+            commits: 提交数量
+            branches: 分支数量
+            include_branches: 是否获取分支
+            include_readme: 是否获取README
+            
+        Returns:
+            Dict: 包含repo、commits、branches、readme的统一结构
+        """
+        commits = max(1, min(commits, GRAPHQL_MAX_COMMITS))
+        branches = max(1, min(branches, GRAPHQL_MAX_BRANCHES))
+        if since and len(since) == 10:
+            since = f"{since}T00:00:00Z"
+        if not self.token:
+            return await self._get_repo_bundle_rest(owner, repo, ref, since, commits, branches, include_branches, include_readme)
+        
+        rev = ref or "HEAD"
+        variables = {
+            "owner": owner,
+            "repo": repo,
+            "rev": rev,
+            "commits": commits,
+            "since": since,
+            "branches": branches,
+            "withBranches": include_branches,
+            "withReadme": include_readme,
+        }
+        variables.update({f"readme{i}": f"{rev}:{name}" for i, name in enumerate(README_NAMES)})
+        data = await self.graphql(REPO_BUNDLE_QUERY, variables)
+        repository = data.get("repository")
+        if not repository:
+            raise ValueError(f"未找到存储库: {owner}/{repo}")
+        
+        history = ((repository.get("head") or {}).get("history") or {}).get("nodes", [])
+        readme = next(
+            (repository[f"readme{i}"]["text"] for i in range(len(README_NAMES)) if (repository.get(f"readme{i}") or {}).get("text") is not None),
+            None,
+        )
+        return {
+            "repo": {
+                "full_name": repository["nameWithOwner"],
+                "description": repository.get("description"),
+                "url": repository.get("url"),
+                "stars": repository.get("stargazerCount", 0),
+                "forks": repository.get("forkCount", 0),
+                "open_issues": (repository.get("issues") or {}).get("totalCount", 0),
+                "language": (repository.get("primaryLanguage") or {}).get("name"),
+                "license": (repository.get("licenseInfo") or {}).get("name"),
+                "created_at": repository.get("createdAt"),
+                "updated_at": repository.get("updatedAt"),
+                "default_branch": (repository.get("defaultBranchRef") or {}).get("name"),
+            },
+            "commits": [
+                {
+                    "sha": node["oid"],
+                    "message": node.get("message", ""),
+                    "author": ((node.get("author") or {}).get("user") or {}).get("login") or (node.get("author") or {}).get("name", ""),
+                    "date": node.get("committedDate", ""),
+                    "url": node.get("url", ""),
+                    "additions": node.get("additions", 0),
+                    "deletions": node.get("deletions", 0),
+                    "changed_files": node.get("changedFilesIfAvailable"),
+                }
+                for node in history
+            ],
+            "branches": [
+                {"name": node["name"], "sha": (node.get("target") or {}).get("oid", "")}
+                for node in (repository.get("refs") or {}).get("nodes", [])
+            ],
+            "readme": readme,
+        }
+    
+    async def _get_repo_bundle_rest(self, owner, repo, ref, since, commits, branches, include_branches, include_readme) -> Dict:
+        """无令牌时用REST接口拼出与GraphQL相同的结构，各请求并发发送"""
+        params = {"per_page": commits}
+        if ref:
+            params["sha"] = ref
+        if since:
+            params["since"] = since
+        
+        async def optional(coro):
+            # 分支和README获取失败不影响整体结果
+            try:
+                return await coro
+            except ValueError:
+                return None
+        
+        repo_data, commit_list, branch_list, readme = await asyncio.gather(
+            self._make_request(f"/repos/{owner}/{repo}"),
+            self._make_request(f"/repos/{owner}/{repo}/commits", params=params),
+            optional(self._make_request(f"/repos/{owner}/{repo}/branches", params={"per_page": branches})) if include_branches else asyncio.sleep(0),
+            optional(self._make_request(f"/repos/{owner}/{repo}/readme", params={"ref": ref} if ref else {})) if include_readme else asyncio.sleep(0),
+        )
+        # 按SHA获取的提交详情会被长期缓存，重复查询不再消耗配额；数量受限以节省匿名配额
+        details = await asyncio.gather(
+            *(optional(self.get_commit(owner, repo, commit["sha"])) for commit in commit_list[:REST_COMMIT_STATS_LIMIT])
+        )
+        details += [None] * (len(commit_list) - len(details))
+        
+        readme_text = None
+        if readme and readme.get("encoding") == "base64":
+            try:
+                readme_text = base64.b64decode(readme["content"].replace("\n", "")).decode("utf-8")
+            except UnicodeDecodeError:
+                readme_text = "[二进制内容，无法显示]"
+        return {
+            "repo": {
+                "full_name": repo_data.get("full_name", f"{owner}/{repo}"),
+                "description": repo_data.get("description"),
+                "url": repo_data.get("html_url"),
+                "stars": repo_data.get("stargazers_count", 0),
+                "forks": repo_data.get("forks_count", 0),
+                "open_issues": repo_data.get("open_issues_count", 0),
+                "language": repo_data.get("language"),
+                "license": (repo_data.get("license") or {}).get("name"),
+                "created_at": repo_data.get("created_at"),
+                "updated_at": repo_data.get("updated_at"),
+                "default_branch": repo_data.get("default_branch"),
+            },
+            "commits": [
+                {
+                    "sha": commit.get("sha", ""),
+                    "message": commit.get("commit", {}).get("message", ""),
+                    "author": (commit.get("author") or {}).get("login") or commit.get("commit", {}).get("author", {}).get("name", ""),
+                    "date": commit.get("commit", {}).get("committer", {}).get("date", ""),
+                    "url": commit.get("html_url", ""),
+                    "additions": detail.get("stats", {}).get("additions", 0) if detail else None,
+                    "deletions": detail.get("stats", {}).get("deletions", 0) if detail else None,
+                    "changed_files": len(detail.get("files", [])) if detail else None,
+                }
+                for commit, detail in zip(commit_list, details)
+            ],
+            "branches": [
+                {"name": branch.get("name", ""), "sha": branch.get("commit", {}).get("sha", "")}
+                for branch in (branch_list or [])
+            ],
+            "readme": readme_text,
+        }
+    
     async def get_commit(self, owner: str, repo: str, sha: str, page: int = 1, per_page: int = 30) -> Dict:
         """获取特定提交的详细信息
         
@@ -457,6 +1022,49 @@ class GitHubClient:
         return await self._make_request(endpoint, params=params)
 
 
+def format_commit_table(commits: List[Dict]) -> str:
+    """把get_repo_bundle返回的提交格式化为Markdown表格"""
+    if not commits:
+        return "（没有符合条件的提交）\n"
+    rows = "| 提交SHA | 提交信息 | 作者 | 时间 | 变更 |\n| --- | --- | --- | --- | --- |\n"
+    for commit in commits:
+        message = commit["message"].splitlines()[0][:80].replace("|", "\\|") if commit["message"] else ""
+        files = f"{commit['changed_files']}个文件 " if commit["changed_files"] is not None else ""
+        changes = f"{files}+{commit['additions']} -{commit['deletions']}" if commit["additions"] is not None else "未统计"
+        rows += f"| {commit['sha'][:7]} | {message} | {commit['author']} | {commit['date']} | {changes} |\n"
+    return rows
+
+
+def format_repo_bundle(bundle: Dict, readme_chars: int = OVERVIEW_README_CHARS) -> str:
+    """把get_repo_bundle的结果格式化为存储库概览"""
+    info = bundle["repo"]
+    text = f"""
+## 存储库概览: {info['full_name']}
+
+- 描述: {info['description'] or '无描述'}
+- URL: {info['url']}
+- 星标数: {info['stars']}
+- Fork数: {info['forks']}
+- 开放问题: {info['open_issues']}
+- 主要语言: {info['language'] or '未指定'}
+- 许可证: {info['license'] or '未指定'}
+- 默认分支: {info['default_branch']}
+- 创建于: {info['created_at']}
+- 最后更新: {info['updated_at']}
+
+### 最近提交
+
+{format_commit_table(bundle['commits'])}"""
+    if bundle["branches"]:
+        text += "\n### 分支\n\n" + "".join(f"- {branch['name']} ({branch['sha'][:7]})\n" for branch in bundle["branches"])
+    if bundle["readme"] is not None:
+        readme = bundle["readme"]
+        if len(readme) > readme_chars:
+            readme = readme[:readme_chars] + "\n\n...（README已截断，完整内容请使用get_readme工具）"
+        text += f"\n### README\n\n{readme}\n"
+    return text
+
+
 async def github_api_request(endpoint: str, method: str = "GET", params: dict = None, headers: dict = None, data: dict = None) -> Dict[str, Any]:
     """
     发送请求到GitHub API
@@ -471,7 +1079,7 @@ async def github_api_request(endpoint: str, method: str = "GET", params: dict =
     Returns:
         API响应数据
     """
-    from httpx import AsyncClient, HTTPError
+    from httpx import HTTPError
     
     url = f"{GITHUB_API_BASE_URL}{endpoint}"
     default_headers = {
@@ -488,38 +1096,41 @@ async def github_api_request(endpoint: str, method: str = "GET", params: dict =
     if headers:
         default_headers.update(headers)
     
-    async with AsyncClient() as client:
-        try:
-            if method == "GET":
-                response = await client.get(url, params=params, headers=default_headers, timeout=30)
-            elif method == "POST":
-                response = await client.post(url, json=data, params=params, headers=default_headers, timeout=30)
-            elif method == "PUT":
-                response = await client.put(url, json=data, params=params, headers=default_headers, timeout=30)
-            elif method == "DELETE":
-                response = await client.delete(url, params=params, headers=default_headers, timeout=30)
-            elif method == "PATCH":
-                response = await client.patch(url, json=data, params=params, headers=default_headers, timeout=30)
-            else:
-                raise McpError(INTERNAL_ERROR, f"不支持的HTTP方法: {method}")
-                
-            response.raise_for_status()
-            return response.json() if response.text else {}
-            
-        except HTTPError as e:
-            error_message = f"GitHub API请求失败: {e!r}"
-            if e.response and e.response.text:
-                try:
-                    error_data = e.response.json()
-                    if "message" in error_data:
-                        error_message = f"GitHub API错误: {error_data['message']}"
-                except:
-                    error_message = f"GitHub API错误: {e.response.text}"
-            raise McpError(INTERNAL_ERROR, error_message)
+    if method not in ("GET", "POST", "PUT", "DELETE", "PATCH"):
+        raise McpError(INTERNAL_ERROR, f"不支持的HTTP方法: {method}")
+    
+    try:
+        response = await scheduled_request(
+            method,
+            url,
+            token_identity(github_token),
+            resource_family(endpoint),
+            params=params,
+            headers=default_headers,
+            json=data if method in ("POST", "PUT", "PATCH") else None,
+        )
+        response.raise_for_status()
+        return response.json() if response.text else {}
+        
+    except HTTPError as e:
+        error_message = f"GitHub API请求失败: {e!r}"
+        if e.response and e.response.text:
+            try:
+                error_data = e.response.json()
+                if "message" in error_data:
+                    error_message = f"GitHub API错误: {error_data['message']}"
+            except:
+                error_message = f"GitHub API错误: {e.response.text}"
+        raise McpError(INTERNAL_ERROR, error_message)
+    except ValueError as e:
+        # 速率限制排队超时
+        raise McpError(INTERNAL_ERROR, str(e))
 
 
 async def serve() -> None:
     """启动Github MCP服务"""
+    # 所有工具调用共享同一个连接池，与api.github.com的TLS连接只建立一次
+    get_http_client()
     # 创建GitHubClient实例
     client = GitHubClient()
     
@@ -645,6 +1256,46 @@ async def serve() -> None:
                     },
                     "required": ["owner", "repo", "sha"]
                 }
+            ),
+            Tool(
+                name="get_repo_overview",
+                description="一次调用获取存储库概览：基本信息、最近提交（含增删行数和变更文件数）、分支列表和README，代替分别调用get_repo、list_commits、get_commit、list_branches和get_readme",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "owner": {"type": "string", "description": "存储库所有者"},
+                        "repo": {"type": "string", "description": "存储库名称"},
+                        "ref": {"type": "string", "description": "提交历史的分支、标签或SHA，默认为默认分支"},
+                        "since": {"type": "string", "description": "只包含该时间之后的提交，ISO 8601格式，如2025-01-01或2025-01-01T08:00:00Z"},
+                        "commit_count": {"type": "integer", "description": "提交数量，默认5，最大100"},
+                        "branch_count": {"type": "integer", "description": "分支数量，默认10，最大100"},
+                        "include_readme": {"type": "boolean", "description": "是否包含README，默认true"}
+                    },
+                    "required": ["owner", "repo"]
+                }
+            ),
+            Tool(
+                name="get_recent_commits",
+                description="一次调用获取最近的提交及每个提交的增删行数和变更文件数，无需再逐个调用get_commit；可用since筛选某天以来的提交；未配置令牌时只有最近几个提交带统计",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "owner": {"type": "string", "description": "存储库所有者"},
+                        "repo": {"type": "string", "description": "存储库名称"},
+                        "ref": {"type": "string", "description": "分支、标签或SHA，默认为默认分支"},
+                        "since": {"type": "string", "description": "只包含该时间之后的提交，ISO 8601格式，如2025-01-01或2025-01-01T08:00:00Z"},
+                        "count": {"type": "integer", "description": "提交数量，默认5，最大100"}
+                    },
+                    "required": ["owner", "repo"]
+                }
+            ),
+            Tool(
+                name="get_rate_limit",
+                description="查询GitHub API剩余调用配额（按core、search、graphql等资源族）及重置时间，用于规划后续调用；本查询不消耗配额",
+                inputSchema={
+                    "type": "object",
+                    "properties": {}
+                }
             )
         ]
     
@@ -802,6 +1453,65 @@ async def serve() -> None:
                 except Exception as e:
                     return [TextContent(type="text", text=f"获取提交详情失败: {str(e)}")]
             
+            elif name == "get_repo_overview":
+                try:
+                    bundle = await client.get_repo_bundle(
+                        arguments["owner"],
+                        arguments["repo"],
+                        ref=arguments.get("ref"),
+                        since=arguments.get("since"),
+                        commits=arguments.get("commit_count", 5),
+                        branches=arguments.get("branch_count", 10),
+                        include_readme=arguments.get("include_readme", True),
+                    )
+                    return [TextContent(type="text", text=format_repo_bundle(bundle))]
+                except Exception as e:
+                    return [TextContent(type="text", text=f"获取存储库概览失败: {str(e)}")]
+            
+            elif name == "get_recent_commits":
+                try:
+                    bundle = await client.get_repo_bundle(
+                        arguments["owner"],
+                        arguments["repo"],
+                        ref=arguments.get("ref"),
+                        since=arguments.get("since"),
+                        commits=arguments.get("count", 5),
+                        include_branches=False,
+                        include_readme=False,
+                    )
+                    return [TextContent(
+                        type="text",
+                        text=f"## {bundle['repo']['full_name']} 最近提交\n\n" + format_commit_table(bundle["commits"])
+                    )]
+                except Exception as e:
+                    return [TextContent(type="text", text=f"获取最近提交失败: {str(e)}")]
+            
+            elif name == "get_rate_limit":
+                try:
+                    result = await client.get_rate_limit()
+                    scheduler = result["scheduler"]
+                    families = list(result["resources"]) or list(scheduler)
+                    rows = ""
+                    for family in families:
+                        quota = result["resources"].get(family) or scheduler.get(family, {})
+                        local = scheduler.get(family, {})
+                        rows += (
+                            f"| {family} | {quota.get('remaining', '未知')} / {quota.get('limit', '未知')} "
+                            f"| {format_reset(quota.get('reset'))} | {local.get('requests', 0)} "
+                            f"| {local.get('throttled', 0)} ({local.get('waited_seconds', 0):.1f}s) |\n"
+                        )
+                    cache = result["cache"]
+                    return [TextContent(type="text", text=f"""
+## GitHub API配额
+
+| 资源族 | 剩余/上限 | 重置时间 | 本会话请求数 | 排队次数(累计等待) |
+| --- | --- | --- | --- | --- |
+{rows or '| - | 暂无数据 | - | 0 | 0 |'}
+条件请求缓存: 直接命中 {cache['fresh']} 次, 304重新验证 {cache['revalidated']} 次（均不消耗配额）, 未命中 {cache['miss']} 次
+""")]
+                except Exception as e:
+                    return [TextContent(type="text", text=f"获取速率限制失败: {str(e)}")]
+            
             else:
                 return [TextContent(type="text", text=f"未知工具: {name}")]
                 
@@ -829,12 +1539,16 @@ async def serve() -> None:
 6. **获取README** - 获取存储库的README文件
 7. **列出提交** - 获取存储库的提交历史记录
 8. **获取提交详情** - 查看特定提交的详细信息
+9. **查询API配额** - 查看剩余调用配额和重置时间，配额不足时服务会自动排队等待
+10. **存储库概览** - get_repo_overview一次返回基本信息、最近提交、分支和README
+11. **最近提交及变更统计** - get_recent_commits一次返回最近提交及每个提交的增删行数
 
 ## 使用提示:
 
 - 搜索时可以使用GitHub的高级搜索语法，如`language:python stars:>100`
 - 在获取文件内容时，如果文件过大，可能只会返回部分内容
 - 查看提交历史时可以指定分支名或路径过滤
+- 需要同时了解存储库信息、提交和分支时，优先使用get_repo_overview或get_recent_commits，一次调用即可完成
                 """,
                 arguments=[]
             ),
@@ -898,8 +1612,12 @@ async def serve() -> None:
     
     # 启动服务器
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, options, raise_exceptions=True)
+    finally:
+        await close_http_client()
+        close_request_cache()
 
 
 def main():
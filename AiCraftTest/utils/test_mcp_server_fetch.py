@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+测试爬取时的链接解析、路径范围和本地存储读取
+"""
+
+import asyncio
+import os
+import stat
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+httpx = pytest.importorskip("httpx")
+fetch = pytest.importorskip("mcp_server_fetch", exc_type=ImportError)
+
+
+SITE = {
+    "https://example.com/docs": (301, {"location": "https://example.com/docs/"}, ""),
+    "https://example.com/docs/": (200, {"content-type": "text/html"}, '<a href="intro.html">intro</a> <a href="../blog/">blog</a>'),
+    "https://example.com/docs/intro.html": (200, {"content-type": "text/html"}, '<a href="#top">top</a> <a href="/docs/">home</a>'),
+}
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """用MockTransport模拟站点，关闭磁盘缓存并直接把HTML当作markdown"""
+    requested = []
+
+    def handler(request):
+        url = str(request.url)
+        requested.append(url)
+        status, headers, body = SITE.get(url, (404, {}, ""))
+        return httpx.Response(status, headers=headers, text=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(fetch, "get_http_client", lambda: client)
+    monkeypatch.setattr(fetch, "get_response_cache", lambda: None)
+    monkeypatch.setattr(fetch, "_host_semaphores", {})
+
+    async def get_page_markdown(page, engine="auto"):
+        return page["text"]
+
+    monkeypatch.setattr(fetch, "get_page_markdown", get_page_markdown)
+    return requested
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    path = tmp_path / "cache"
+    monkeypatch.setattr(fetch, "FETCH_CACHE_DIR", str(path))
+    monkeypatch.setattr(fetch, "_response_cache", None)
+    monkeypatch.setattr(fetch, "_response_cache_disabled", False)
+    yield path
+    fetch.close_response_cache()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="权限位仅在POSIX上有意义")
+def test_response_cache_dir_is_made_private(cache_dir):
+    pytest.importorskip("diskcache")
+    cache_dir.mkdir(mode=0o777)
+    os.chmod(cache_dir, 0o777)
+    assert fetch.get_response_cache() is not None
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+
+
+def test_response_cache_is_disabled_when_dir_cannot_be_private(cache_dir, monkeypatch):
+    pytest.importorskip("diskcache")
+
+    def refuse(path, mode):
+        raise PermissionError("not owner")
+
+    monkeypatch.setattr(fetch.os, "chmod", refuse)
+    with pytest.warns(UserWarning, match="Response cache disabled"):
+        assert fetch.get_response_cache() is None
+    assert fetch.get_response_cache() is None
+
+
+def test_extract_links_resolves_relative_and_base_href():
+    html = '<base href="/guide/"><a href="a.html">a</a><a href="../b">b</a><a href="mailto:x@example.com">m</a>'
+    assert fetch.extract_links(html, "https://example.com/docs/index.html") == [
+        "https://example.com/guide/a.html",
+        "https://example.com/b",
+    ]
+
+
+def test_normalize_crawl_url():
+    assert fetch.normalize_crawl_url("HTTPS://Example.COM#top") == "https://example.com/"
+    assert fetch.normalize_crawl_url("https://example.com/docs/?q=1#x") == "https://example.com/docs/?q=1"
+
+
+@pytest.mark.parametrize("path, prefix", [
+    ("", "/"),
+    ("/docs", "/docs"),
+    ("/docs/", "/docs/"),
+    ("/docs/intro.html", "/docs/"),
+])
+def test_default_crawl_prefix(path, prefix):
+    assert fetch.default_crawl_prefix(path) == prefix
+
+
+def test_fetch_page_records_final_url(site):
+    page = asyncio.run(fetch.fetch_page("https://example.com/docs", "test"))
+    assert page["url"] == "https://example.com/docs/"
+
+
+def test_idle_host_slots_are_released(site):
+    hosts = [f"host{i}.example" for i in range(3)]
+
+    async def request(host):
+        async with fetch.host_slot(f"https://{host}/"):
+            assert host in fetch._host_semaphores
+
+    async def main():
+        await asyncio.gather(*(request(host) for host in hosts))
+
+    asyncio.run(main())
+    assert fetch._host_semaphores == {}
+
+
+def test_crawl_resolves_links_against_redirect_target(site):
+    stats = asyncio.run(fetch.crawl_site("https://example.com/docs", "test", delay=0, check_robots=False))
+    assert stats["path_prefix"] == "/docs"
+    assert [page["url"] for page in stats["pages"] if page["status"] == "ok"] == [
+        "https://example.com/docs",
+        "https://example.com/docs/intro.html",
+    ]
+    assert "https://example.com/blog/" not in site
+
+
+def test_cached_pages_skip_politeness_delay(site, monkeypatch):
+    cache = {
+        url: {"url": url, "text": body, "content_type": "text/html", "expires_at": float("inf")}
+        for url, (_, _, body) in SITE.items()
+        if url.endswith(("/", ".html"))
+    }
+
+    class Cache:
+        def get(self, key):
+            return cache.get(key)
+
+        def set(self, key, value, expire=None):
+            cache[key] = value
+
+    monkeypatch.setattr(fetch, "get_response_cache", lambda: Cache())
+    monkeypatch.setattr(fetch, "_covers", lambda cached, max_chars, force_raw: True)
+    stats = asyncio.run(fetch.crawl_site("https://example.com/docs/", "test", delay=60, check_robots=False, deadline=5))
+    assert not stats["timed_out"] and site == []
+
+
+def test_fetch_reads_crawl_store_with_normalized_url(site, monkeypatch):
+    stored = {}
+
+    class Cache:
+        def get(self, key):
+            return stored.get(key)
+
+        def set(self, key, value, expire=None):
+            stored[key] = value
+
+    monkeypatch.setattr(fetch, "get_response_cache", lambda: Cache())
+    asyncio.run(fetch.store_crawled_page("https://example.com/docs/intro.html", "# Intro", "hash"))
+    text = asyncio.run(fetch.fetch_for_tool("https://EXAMPLE.com/docs/intro.html#usage", "test", 100, check_robots=False))
+    assert text.endswith("# Intro") and site == []
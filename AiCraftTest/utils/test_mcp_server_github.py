@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+测试GitHub请求缓存（缓存目录权限、ETag条件请求、按令牌隔离）和速率限制调度
+"""
+
+import asyncio
+import os
+import stat
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+pytest.importorskip("diskcache")
+httpx = pytest.importorskip("httpx")
+try:
+    github = __import__("mcp_server_github")
+except (ImportError, SyntaxError) as e:
+    pytest.skip(f"mcp_server_github无法导入: {e}", allow_module_level=True)
+
+
+COMMIT_SHA = "a" * 40
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    """用MockTransport模拟GitHub API，记录每个请求的URL和条件请求头"""
+    requests = []
+
+    def handler(request):
+        requests.append((request.url.path, request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"path": request.url.path})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(github, "get_http_client", lambda: client)
+    monkeypatch.setattr(github, "rate_limiter", github.RateLimitScheduler())
+    monkeypatch.setattr(github, "GITHUB_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(github, "_request_cache", None)
+    yield requests
+    github.close_request_cache()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="权限位仅在POSIX上有意义")
+def test_cache_dir_is_private(api):
+    assert github.get_request_cache() is not None
+    assert stat.S_IMODE(os.stat(github.GITHUB_CACHE_DIR).st_mode) == 0o700
+
+
+def test_etag_revalidation_returns_cached_data(api):
+    client = github.GitHubClient(token="t1")
+    first = asyncio.run(client._make_request("/repos/o/r"))
+    second = asyncio.run(client._make_request("/repos/o/r"))
+    assert first == second == {"path": "/repos/o/r"}
+    assert api == [("/repos/o/r", None), ("/repos/o/r", '"v1"')]
+    assert client.cache_stats == {"fresh": 0, "revalidated": 1, "miss": 1}
+
+
+def test_cache_is_separated_per_token(api):
+    asyncio.run(github.GitHubClient(token="t1")._make_request("/repos/o/r"))
+    asyncio.run(github.GitHubClient(token="t2")._make_request("/repos/o/r"))
+    assert [etag for _, etag in api] == [None, None]
+
+
+def test_immutable_requests_skip_the_network(api):
+    client = github.GitHubClient(token="t1")
+    for _ in range(2):
+        asyncio.run(client._make_request(f"/repos/o/r/commits/{COMMIT_SHA}"))
+    assert len(api) == 1 and client.cache_stats["fresh"] == 1
+
+
+def test_low_quota_paces_concurrent_requests_without_serializing_waits(monkeypatch):
+    now = 1_000_000.0
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(round(delay, 6))
+
+    monkeypatch.setattr(github.time, "time", lambda: now)
+    monkeypatch.setattr(github.asyncio, "sleep", fake_sleep)
+
+    scheduler = github.RateLimitScheduler()
+    bucket = scheduler._bucket("t", "core")
+    bucket.update(limit=5000, remaining=4, reset=now + 0.8)
+    scheduler._bucket("t", "search").update(limit=30, remaining=0, reset=now + 0.5)
+
+    async def request(family):
+        async with scheduler.slot("t", family):
+            pass
+
+    async def main():
+        await asyncio.gather(request("search"), *(request("core") for _ in range(3)))
+
+    asyncio.run(main())
+    # 配额耗尽的search等到重置；core按剩余配额在重置前均匀错开，互不阻塞
+    assert sorted(sleeps) == [round(0.8 / 3, 6), 0.5, round(0.8 * 2 / 3, 6)]
+    assert bucket["remaining"] == 1 and bucket["throttled"] == 2
+
+
+def test_anonymous_bundle_limits_commit_stats_requests(monkeypatch):
+    shas = [f"{i:040x}" for i in range(8)]
+    requested = []
+
+    def handler(request):
+        path = request.url.path
+        requested.append(path)
+        if path == "/repos/o/r":
+            return httpx.Response(200, json={"full_name": "o/r", "html_url": "u", "default_branch": "main"})
+        if path == "/repos/o/r/commits":
+            return httpx.Response(200, json=[{"sha": sha, "commit": {"message": "m", "committer": {"date": "d"}}} for sha in shas])
+        if path.startswith("/repos/o/r/commits/"):
+            return httpx.Response(200, json={"sha": path[-40:], "stats": {"additions": 3, "deletions": 1}, "files": [{}]})
+        return httpx.Response(404)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(github, "get_http_client", lambda: client)
+    monkeypatch.setattr(github, "get_request_cache", lambda: None)
+    monkeypatch.setattr(github, "rate_limiter", github.RateLimitScheduler())
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+
+    bundle = asyncio.run(github.GitHubClient().get_repo_bundle("o", "r", commits=len(shas), include_branches=False, include_readme=False))
+    detail_requests = [path for path in requested if path.startswith("/repos/o/r/commits/")]
+    assert len(detail_requests) == github.REST_COMMIT_STATS_LIMIT
+    assert [commit["sha"] for commit in bundle["commits"]] == shas
+    assert bundle["commits"][0]["additions"] == 3 and bundle["commits"][-1]["additions"] is None
+    assert "未统计" in github.format_commit_table(bundle["commits"])